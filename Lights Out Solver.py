@@ -1,7 +1,13 @@
+import random
 import tkinter as tk
-import json
-from collections import deque
-import os
+
+from lights_out.algebra import count_optimal_solutions, press_list, solve_partial
+from lights_out.board_canvas import BoardCanvas
+from lights_out.cache import TableCache
+from lights_out.memo import shared_cache
+from lights_out.table import UNREACHABLE
+from lights_out.render import button_label
+from lights_out.rules import CLASSIC, compile_rule
 
 
 class LightsOutSolver(tk.Tk):
@@ -19,18 +25,31 @@ class LightsOutSolver(tk.Tk):
 
         self.title('Lights Out Solver')
 
-        self.board_vars = [[tk.IntVar() for _ in range(5)] for _ in range(5)]
         self.button_lookup = self.get_button_lookup()
+        self.rule = CLASSIC
+        self.masks = compile_rule(self.BOARD_SIZE, self.BOARD_SIZE, self.rule).masks
 
+        self.cache = TableCache()
         self.solutions = None
+        self.steps = []
+        self.step_index = 0
+        self.optimal = None
+        self.assumed = None
+        self.moves = 0
 
         self.main_frame = None
         self.control_frame = None
         self.new_button = None
         self.solve_button = None
+        self.play_button = None
         self.load_button = None
         self.board_frame = None
-        self.check_buttons = None
+        self.board_canvas = None
+        self.step_frame = None
+        self.prev_button = None
+        self.next_button = None
+        self.hint_button = None
+        self.moves_label = None
         self.text_frame = None
         self.solution_text = None
 
@@ -65,56 +84,67 @@ class LightsOutSolver(tk.Tk):
             width=10
         )
 
+        self.play_button = tk.Button(
+            master=self.control_frame,
+            command=self.play,
+            text='Play',
+            width=10
+        )
+
         self.load_button = tk.Button(
             master=self.control_frame,
             command=self.load_solutions,
             text='Load Solutions',
         )
-        self.load_button.grid(row=0, column=0, columnspan=2)
+        self.load_button.grid(row=0, column=0, columnspan=3)
 
         self.board_frame = tk.Frame(
             master=self.main_frame
         )
         self.board_frame.grid(row=1, column=0)
 
-        # Place top labels
-        for i in range(5):
-            tk.Label(
-                master=self.board_frame,
-                text=i + 1
-            ).grid(row=0, column=i + 1)
-
-        # Place side Labels
-        for i in range(5):
-            tk.Label(
-                master=self.board_frame,
-                text='ABCDE'[i]
-            ).grid(row=i + 1, column=0)
-
-        # Place right padding
-        for i in range(6):
-            tk.Label(
-                master=self.board_frame,
-                text=' '
-            ).grid(row=i, column=6)
-
-        self.check_buttons = [[] for _ in range(self.BOARD_SIZE)]
-
-        for i in range(self.BOARD_SIZE):
-            for j in range(self.BOARD_SIZE):
-                chk_btn = tk.Checkbutton(
-                    master=self.board_frame,
-                    variable=self.board_vars[i][j],
-                    state=tk.DISABLED
-                )
-                chk_btn.grid(row=i + 1, column=j + 1)
-
-                self.check_buttons[i].append(chk_btn)
+        self.board_canvas = BoardCanvas(
+            master=self.board_frame,
+            rows=self.BOARD_SIZE,
+            cols=self.BOARD_SIZE
+        )
+        self.board_canvas.grid(row=0, column=0, padx=5, pady=5)
+
+        self.step_frame = tk.Frame(
+            master=self.main_frame
+        )
+        self.step_frame.grid(row=2, column=0)
+
+        self.prev_button = tk.Button(
+            master=self.step_frame,
+            command=lambda: self.show_step(self.step_index - 1),
+            text='< Prev',
+            width=10
+        )
+
+        self.next_button = tk.Button(
+            master=self.step_frame,
+            command=lambda: self.show_step(self.step_index + 1),
+            text='Next >',
+            width=10
+        )
+
+        self.hint_button = tk.Button(
+            master=self.step_frame,
+            command=self.hint,
+            text='Hint',
+            width=10
+        )
+
+        self.moves_label = tk.Label(
+            master=self.step_frame,
+            width=16
+        )
 
         self.text_frame = tk.Frame(
             master=self.main_frame
         )
-        self.text_frame.grid(row=2, column=0)
+        self.text_frame.grid(row=3, column=0)
 
         self.solution_text = tk.Text(
             master=self.text_frame,
@@ -129,140 +159,185 @@ class LightsOutSolver(tk.Tk):
         Load the predetermined Lights Out solutions.
         :return:
         """
-        # Check if file exists
-        if not os.path.exists('data'):
-            os.mkdir('data')
-
-        if not os.path.exists('./data/solvable_states.json'):
-            self.write_to_text('Generating Lights Out \nsolutions.\nWill take a while...')
-            self.update()
-            self.generate_solutions()
-
-        with open('./data/solvable_states.json') as file:
-            self.write_to_text('Loading Lights Out solutions.\nPlease be patient.')
-            self.update()
-            self.solutions = json.load(file)
+        self.write_to_text('Loading Lights Out solutions.\nPlease be patient.')
+        self.update()
+        self.solutions = self.cache.get(
+            self.BOARD_SIZE, self.BOARD_SIZE, self.rule, progress=self.generation_progress
+        )
 
         self.load_button.grid_forget()
         self.new_button.grid(row=0, column=0, padx=5, pady=5)
         self.solve_button.grid(row=0, column=1, padx=5, pady=5)
+        self.play_button.grid(row=0, column=2, padx=5, pady=5)
         self.new()
         self.update()
 
-    def generate_solutions(self):
+    def generation_progress(self, depth, state_count):
         """
-        Generate the solutions dataset if doesn't exist.
+        Report progress while the solutions dataset is generated for the first time.
+        :param depth: Number of presses reached by the search.
+        :param state_count: Number of solvable boards found so far.
         :return:
         """
-        masks = []
-
-        for i in range(25):
-            board = 0
-            board += 1 << i
-            if (i + 1) % 5 != 0:
-                board += 1 << i + 1
-            if i % 5 != 0:
-                board += 1 << i - 1
-            if i + 5 <= 24:
-                board += 1 << i + 5
-            if i - 5 > 0:
-                board += 1 << i - 5
-
-            masks.append(board)
-
-        start_state = 0
-        state_lookup = {start_state: {'next_state': None, 'button': None}}
-
-        queue = deque()
-        queue.append(start_state)
+        self.write_to_text(
+            'Generating Lights Out \nsolutions.\nWill take a while...\n\n'
+            f'Presses searched {depth}\nSolutions generated\n{state_count:,}'
+        )
+        self.update()
 
-        gen_msg = 'Generating Lights Out \nsolutions.\nWill take a while...\n\n'
+    def new(self):
+        """
+        Reset the Lights Out Board and open it for selection.
+        :return:
+        """
+        self.steps = []
+        for widget in self.step_frame.grid_slaves():
+            widget.grid_forget()
 
-        state_count = 0
-        while queue:
-            state_count += 1
-            if state_count % 10000 == 0:
+        self.board_canvas.command = None
+        self.board_canvas.highlight(None)
+        self.board_canvas.set_board(0)
+        self.board_canvas.enabled = True
 
-                self.write_to_text(gen_msg + f'Solutions generated\n{state_count:,}')
-                self.update()
-            current_state = queue.popleft()
-            for button, mask in enumerate(masks):
-                new_state = current_state ^ mask
+        self.write_to_text(
+            'Click lights that are on.\nClick again if unreadable.\n\nThen press "Solve" to solve \nthe board.'
+        )
 
-                if new_state in state_lookup.keys():
-                    continue
+    def play(self):
+        """
+        Start a game on a random solvable board, where clicking a light presses it like the handheld.
+        :return:
+        """
+        self.new()
 
-                state_lookup[new_state] = {'next_state': current_state, 'button': button}
-                queue.append(new_state)
+        board = 0
+        # Presses in the null space cancel out, so keep going until there is something to solve.
+        while board == 0:
+            for button in random.sample(range(len(self.masks)), random.randint(5, 15)):
+                board ^= self.masks[button]
+
+        self.moves = 0
+        self.board_canvas.set_board(board)
+        self.board_canvas.command = self.press
+        self.hint_button.grid(row=0, column=0, padx=5, pady=5)
+        self.moves_label.grid(row=0, column=1, padx=5, pady=5)
+        self.write_to_text('Turn all of the lights out.\n\nPress "Hint" for the best\nnext button.')
+        self.update_moves()
+
+    def press(self, button):
+        """
+        Press a button in play mode.
+        :param button: Index of button pressed.
+        :return:
+        """
+        self.moves += 1
+        self.board_canvas.highlight(None)
+        self.board_canvas.set_board(self.board_canvas.board ^ self.masks[button])
+        self.update_moves()
 
-        with open('./data/solvable_states.json', 'w') as file:
-            self.write_to_text(gen_msg + 'Writing solutions to disk.')
-            self.update()
-            json.dump(state_lookup, file)
+        if self.board_canvas.board == 0:
+            self.board_canvas.enabled = False
+            self.write_to_text(f'Solved in {self.moves} moves!\n\nPress "Play" for another.')
 
-    def new(self):
+    def update_moves(self):
         """
-        Reset the Lights Out Board and open Checkboxes for selection.
+        Show the number of moves made and the fewest still needed, with one table lookup.
         :return:
         """
-        for i in range(self.BOARD_SIZE):
-            for j in range(self.BOARD_SIZE):
-                self.board_vars[i][j].set(0)
-                self.check_buttons[i][j].config(state=tk.NORMAL)
+        depth = self.solutions.depth(self.board_canvas.board)
+        needed = 'unsolvable' if depth == UNREACHABLE else f'{depth} to go'
+        self.moves_label.config(text=f'Moves {self.moves}, {needed}')
 
-        self.write_to_text('Check boxes for lights on.\n\nThen press "Solve" to solve \nthe board.')
+    def hint(self):
+        """
+        Highlight an optimal next press in play mode, with one table lookup.
+        :return:
+        """
+        button, depth = self.solutions.lookup(self.board_canvas.board)
+        if depth != UNREACHABLE and depth > 0:
+            self.board_canvas.highlight(button)
 
     def solve(self):
         """
         Determine the solution and print results to the textbox.
         :return:
         """
-        board = str(self.get_board())
+        board = self.get_board()
+        unknown = self.board_canvas.unknown
+        self.assumed = None
+
+        if unknown:
+            # Solve whichever completion of the unknown lights takes the fewest presses.
+            known = ((1 << self.BOARD_SIZE * self.BOARD_SIZE) - 1) & ~unknown
+            presses = solve_partial(known, board, self.masks)
+            if presses is None:
+                self.write_to_text('Unsolvable board,\nhowever the unknown lights\nare set.')
+                return
+
+            board = 0
+            for button in press_list(presses):
+                board ^= self.masks[button]
+            self.assumed = [self.button_lookup[cell] for cell in press_list(board & unknown)]
+
+        buttons = shared_cache.solve(self.solutions, board)
 
         # Test if solvable.
-        if board not in self.solutions.keys():
-            self.write_to_text(f'Unsolvable board.\nBoard: {board}')
+        if buttons is None:
+            self.write_to_text(shared_cache.text(self.solutions, board))
             return
 
-        message_builder = ''
+        steps = [(board, None)]
+        for button in buttons:
+            steps.append((steps[-1][0] ^ self.masks[button], button))
 
-        state = board
-        button = None
+        self.steps = steps
+        self.optimal = count_optimal_solutions(steps[0][0], self.masks)
+        for widget in self.step_frame.grid_slaves():
+            widget.grid_forget()
+        self.prev_button.grid(row=0, column=0, padx=5, pady=5)
+        self.next_button.grid(row=0, column=1, padx=5, pady=5)
+        self.show_step(0)
 
-        steps = []
-        while state != 'None':
-            steps.append((state, button))
+    def show_step(self, index):
+        """
+        Show one step of the current solution on the board, highlighting the next button to press.
+        :param index: Step to show, 0 being the starting board.
+        :return:
+        """
+        if not 0 <= index < len(self.steps):
+            return
+
+        self.step_index = index
+        last = len(self.steps) - 1
 
-            new_state = self.solutions[state]['next_state']
-            button = self.solutions[state]['button']
+        self.board_canvas.set_board(self.steps[index][0])
+        self.board_canvas.highlight(self.steps[index + 1][1] if index < last else None)
 
-            state = str(new_state)
+        if index == 0:
+            message_builder = f'Starting State. {last} presses needed.\n'
+            if self.assumed is not None:
+                message_builder += f'Unknown lights taken as on: {" ".join(self.assumed) or "none"}\n'
+        else:
+            message_builder = f'Step {index} of {last}. Pressed {self.button_lookup[self.steps[index][1]]}\n'
 
-        for i, step in enumerate(steps):
-            if i == 0:
-                message_builder += 'Starting State\n'
-            else:
-                message_builder += f'Step {i}. Button {self.button_lookup[step[1]]}\n'
-            message_builder += self.board_string(step[0])
+        if index < last:
+            message_builder += f'Next press {self.button_lookup[self.steps[index + 1][1]]}\n'
+        else:
+            message_builder += 'Solved!\n'
+
+        if self.optimal is not None:
+            message_builder += f'\n{self.optimal[1]:,} optimal solution(s) of {self.optimal[0]} presses.\n'
 
         self.write_to_text(message_builder)
 
     def get_board(self):
         """
-        Return the integer value of the board in the application checkboxes.
+        Return the integer value of the board on the canvas and lock it from further edits.
         :return: Integer of board to solve.
         """
-        board_builder = []
-        for i in range(self.BOARD_SIZE):
-            for j in range(self.BOARD_SIZE):
-                board_builder.append(self.board_vars[i][j].get())
-                self.check_buttons[i][j].config(state=tk.DISABLED)
+        self.board_canvas.enabled = False
 
-        board = 0
-        for i in range(len(board_builder)):
-            board += board_builder[i] << i
-
-        return board
+        return self.board_canvas.board
 
     def write_to_text(self, message):
         """
@@ -275,31 +350,6 @@ class LightsOutSolver(tk.Tk):
         self.solution_text.insert(tk.END, message)
         self.solution_text.config(state=tk.DISABLED)
 
-    def board_string(self, board):
-        """
-        Return a string representation of the given board.
-        :param board: Board to represent.
-        :return: String representation with "X" as light on and "O" as off.
-        """
-        board = int(board)
-
-        board_builder = ''
-
-        for i in range(self.BOARD_SIZE * self.BOARD_SIZE):
-            mask = 1 << i
-
-            if board & mask > 0:
-                board_builder += 'X '
-            else:
-                board_builder += 'O '
-
-            if (i + 1) % 5 == 0:
-                board_builder += '\n'
-
-        board_builder += '\n'
-
-        return board_builder
-
     def get_button_lookup(self):
         """
         Generate the button_lookup variable to translate buttons based on grid.
@@ -307,9 +357,7 @@ class LightsOutSolver(tk.Tk):
         """
         button_lookup = {}
         for i in range(self.BOARD_SIZE * self.BOARD_SIZE):
-            grid_loc = f'{"ABCDE"[i // 5]}{(i % 5)+1}'
-
-            button_lookup[i] = grid_loc
+            button_lookup[i] = button_label(i, self.BOARD_SIZE)
 
         return button_lookup
 
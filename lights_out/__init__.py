@@ -0,0 +1,3 @@
+"""
+Supporting engines for the Lights Out Solver application.
+"""
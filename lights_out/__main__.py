@@ -0,0 +1,359 @@
+"""
+Command line interface to the Lights Out engines.
+
+Run python -m lights_out --help for the available commands.
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from .algebra import press_list, solve_many_forbidden
+from .archive import ArchiveTable, benchmark, write_archive
+from .cache import TableCache
+from .distance import distance_matrix, moves_between
+from .export import export_arrow, export_ndjson, export_npy
+from .m4ri import LargeBoardSolver
+from .memo import DEFAULT_MAX_BYTES as MEMO_MAX_BYTES, DEFAULT_MAX_ENTRIES as MEMO_MAX_ENTRIES, shared_cache
+from .mitm import MeetInTheMiddle, benchmark as benchmark_mitm
+from .render import button_label, parse_button, solution_string
+from .rules import RULES, compile_rule
+from .shards import DEFAULT_MAX_BYTES, ShardedTable, write_shards
+from .table import MAX_TABLE_CELLS
+from .verify import verify_table
+
+
+def read_boards(boards, cells, path=None):
+    """
+    Collect the boards given on the command line and in a boards file.
+    :param boards: Board arguments.
+    :param cells: Number of cells on the board. Boards with other bits set are rejected.
+    :param path: Optional file of boards, one per line, or - for stdin.
+    :return: List of integer boards.
+    """
+    boards = [int(board, 0) for board in boards]
+
+    if path:
+        file = sys.stdin if path == '-' else open(path)
+        with file:
+            boards.extend(int(line, 0) for line in file if line.strip())
+
+    for board in boards:
+        # Tables index by board, so a negative board would wrap around to the end of the table.
+        if not 0 <= board < 1 << cells:
+            raise ValueError(f'Board {board} is outside 0 to {(1 << cells) - 1} for {cells} cells')
+
+    return boards
+
+
+def open_store(args):
+    """
+    Open the solution storage selected on the command line.
+    :param args: Parsed arguments.
+    :return: SolutionStore.
+    """
+    rule = RULES[args.rule]
+    if args.shards:
+        return ShardedTable(args.shards, compile_rule(args.size, args.size, rule), args.max_mb << 20)
+    if args.archive:
+        return ArchiveTable(args.archive, compile_rule(args.size, args.size, rule))
+    if args.sqlite:
+        return TableCache().get_sqlite(args.size, args.size, rule)
+
+    return TableCache().get(args.size, args.size, rule)
+
+
+def command_solve(args):
+    """
+    Solve a batch of boards and print one line of button presses per board, or the full solution text.
+    :param args: Parsed arguments.
+    :return:
+    """
+    compiled = compile_rule(args.size, args.size, RULES[args.rule])
+    boards = read_boards(args.boards, compiled.cells, args.file)
+    shared_cache.max_entries = args.memo_entries
+    shared_cache.max_bytes = args.memo_mb << 20
+    masks = compiled.masks
+    store = None
+    texts = {}
+
+    if args.forbid:
+        # Tables always use every button, so broken units are solved algebraically.
+        solutions = solve_many_forbidden(boards, masks, set(args.forbid))
+        paths = {board: None if presses is None else press_list(presses) for board, presses in zip(boards, solutions)}
+    elif compiled.cells > MAX_TABLE_CELLS:
+        # Too big to tabulate, so boards are solved from the cached elimination of the board size.
+        solver = LargeBoardSolver(args.size, args.size, RULES[args.rule])
+        solutions = [solver.solve(board) for board in boards]
+        paths = {board: None if presses is None else press_list(presses) for board, presses in zip(boards, solutions)}
+    else:
+        store = open_store(args)
+        # Visiting sharded boards shard by shard loads each shard once per batch.
+        order = store.prefetch(boards) if isinstance(store, ShardedTable) else boards
+        paths = {}
+        for board in order:
+            # Text is only rendered when it is printed.
+            if args.render:
+                texts[board] = shared_cache.text(store, board)
+            else:
+                paths[board] = shared_cache.solve(store, board)
+
+    for board in boards:
+        buttons = paths.get(board)
+        if board in texts:
+            print(texts[board])
+        elif args.render and buttons is not None:
+            print(solution_string(board, buttons, masks, args.size, args.size))
+        elif buttons is None:
+            print(f'{board}: unsolvable')
+        else:
+            print(f'{board}: ' + ' '.join(button_label(button, args.size) for button in buttons))
+
+    if args.stats:
+        print(f'Solve cache: {shared_cache.stats()}', file=sys.stderr)
+        if isinstance(store, ShardedTable):
+            print(f'Shard cache: {store.stats()}', file=sys.stderr)
+
+
+def command_shard(args):
+    """
+    Split the cached table into shards.
+    :param args: Parsed arguments.
+    :return:
+    """
+    table = TableCache().get(args.size, args.size, RULES[args.rule])
+    write_shards(table, args.directory, args.bits)
+    print(f'Wrote {1 << args.bits} shards to {args.directory}')
+
+
+def command_archive(args):
+    """
+    Write the cached table as a block compressed archive and compare it to the uncompressed table.
+    :param args: Parsed arguments.
+    :return:
+    """
+    table = TableCache().get(args.size, args.size, RULES[args.rule])
+    write_archive(table, args.path, args.block_bits, args.level)
+
+    results = benchmark(table, ArchiveTable(args.path, table.compiled))
+    print(f'Table   {results["table_bytes"]:>14,} bytes {results["table_us"]:>10.1f} us per solve')
+    print(f'Archive {results["archive_bytes"]:>14,} bytes {results["archive_us"]:>10.1f} us per solve')
+    print(f'Compression ratio {results["ratio"]:.2f}')
+
+
+def command_verify(args):
+    """
+    Check the cached table and report the time it took.
+    :param args: Parsed arguments.
+    :return:
+    """
+    table = TableCache(verify=False).get(args.size, args.size, RULES[args.rule])
+
+    start = time.perf_counter()
+    problems = verify_table(table, args.thorough)
+    elapsed = time.perf_counter() - start
+
+    for problem in problems:
+        print(problem)
+    print(f'{"FAILED" if problems else "OK"} in {elapsed:.2f} s')
+    if problems:
+        sys.exit(1)
+
+
+def command_distances(args):
+    """
+    Write the move distance matrix of a set of boards, and print the moves between chosen pairs.
+    :param args: Parsed arguments.
+    :return:
+    """
+    boards = read_boards([], args.size * args.size, args.file)
+    table = TableCache().get(args.size, args.size, RULES[args.rule])
+
+    matrix = distance_matrix(table, boards, args.tile)
+    if args.out.endswith('.npy'):
+        np.save(args.out, matrix)
+    else:
+        np.savetxt(args.out, matrix, fmt='%d', delimiter=',')
+    print(f'Wrote {len(boards):,} x {len(boards):,} distances to {args.out}')
+
+    for first, second in args.moves or []:
+        buttons = moves_between(table, boards[first], boards[second])
+        if buttons is None:
+            print(f'{first} -> {second}: unreachable')
+        else:
+            print(f'{first} -> {second}: ' + ' '.join(button_label(button, args.size) for button in buttons))
+
+
+def command_export(args):
+    """
+    Export the cached table for downstream jobs.
+    :param args: Parsed arguments.
+    :return:
+    """
+    table = TableCache().get(args.size, args.size, RULES[args.rule])
+    exporters = {'npy': export_npy, 'arrow': export_arrow, 'ndjson': export_ndjson}
+    exporters[args.format](table, args.path, args.min_depth, args.max_depth)
+
+
+def command_mitm(args):
+    """
+    Solve boards with the meet-in-the-middle engine, or report its cost for each --bench-k when no boards are given.
+    :param args: Parsed arguments.
+    :return:
+    """
+    compiled = compile_rule(args.size, args.size, RULES[args.rule])
+
+    if not args.boards:
+        print(f'{"k":>3} {"exact":>5} {"entries":>12} {"table MB":>10} {"build s":>9} {"query ms":>10} '
+              f'{"max ms":>9} {"solved":>7}')
+        for result in benchmark_mitm(compiled, args.bench_k):
+            print(f'{result["k"]:>3} {"yes" if result["exact"] else "no":>5} {result["entries"]:>12,} '
+                  f'{result["table_mb"]:>10.1f} {result["build_s"]:>9.2f} {result["query_ms"]:>10.2f} '
+                  f'{result["max_query_ms"]:>9.2f} {result["solved"]:>7}')
+        return
+
+    boards = read_boards(args.boards, compiled.cells)
+    # Covering the larger half, which gets the odd button, makes the answers optimal.
+    k = compiled.cells - compiled.cells // 2 if args.k is None else args.k
+    engine = MeetInTheMiddle(compiled, k)
+    for board in boards:
+        presses = engine.solve(board)
+        if presses is None and engine.exact:
+            print(f'{board}: unsolvable')
+        elif presses is None:
+            print(f'{board}: no solution within {engine.k} presses per half')
+        else:
+            print(f'{board}: ' + ' '.join(button_label(button, args.size) for button in press_list(presses)))
+
+
+def command_query(args):
+    """
+    Print the boards matching a depth, first button or light count from the SQLite store.
+    :param args: Parsed arguments.
+    :return:
+    """
+    store = TableCache().get_sqlite(args.size, args.size, RULES[args.rule])
+
+    if args.lights is not None:
+        if args.count:
+            print(store.count_with_lights(args.lights, args.depth))
+        else:
+            print('\n'.join(map(str, store.boards_with_lights(args.lights, args.depth))))
+    elif args.depth is not None:
+        if args.count:
+            print(store.count_at_depth(args.depth, args.button))
+        else:
+            print('\n'.join(map(str, store.boards_at_depth(args.depth, args.button))))
+    else:
+        for depth, count in sorted(store.depth_counts().items()):
+            print(f'{depth}: {count:,}')
+
+
+def build_parser():
+    """
+    :return: ArgumentParser for the command line interface.
+    """
+    parser = argparse.ArgumentParser(prog='python -m lights_out', description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--size', type=int, default=5, help='board width and height (default 5)')
+    parser.add_argument('--rule', choices=RULES, default='classic', help='rule variant (default classic)')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    solve = commands.add_parser('solve', help='solve a batch of boards')
+    solve.add_argument('boards', nargs='*', help='integer boards to solve')
+    solve.add_argument('--file', help='file of boards, one per line, or - for stdin')
+    solve.add_argument('--forbid', action='append', metavar='BUTTON',
+                       help='broken button that must not be pressed, repeat for each one')
+    solve.add_argument('--shards', help='solve from a directory written by the shard command')
+    solve.add_argument('--max-mb', type=int, default=DEFAULT_MAX_BYTES >> 20, help='memory cap of loaded shards')
+    solve.add_argument('--archive', help='solve from a block compressed archive')
+    solve.add_argument('--sqlite', action='store_true', help='solve from the SQLite store')
+    solve.add_argument('--memo-entries', type=int, default=MEMO_MAX_ENTRIES, help='solutions kept in the solve cache')
+    solve.add_argument('--memo-mb', type=int, default=MEMO_MAX_BYTES >> 20, help='memory cap of the solve cache')
+    solve.add_argument('--render', action='store_true', help='print every step of each solution')
+    solve.add_argument('--stats', action='store_true', help='print solve and shard cache counters to stderr')
+    solve.set_defaults(func=command_solve)
+
+    shard = commands.add_parser('shard', help='split the solution table into shards')
+    shard.add_argument('directory', help='directory to write the shards to')
+    shard.add_argument('--bits', type=int, default=6, help='high board bits that pick the shard (default 6)')
+    shard.set_defaults(func=command_shard)
+
+    archive = commands.add_parser('archive', help='write a block compressed archive of the solution table')
+    archive.add_argument('path', help='archive file to write')
+    archive.add_argument('--block-bits', type=int, default=12, help='each block holds 2**bits boards (default 12)')
+    archive.add_argument('--level', type=int, default=6, help='zlib compression level (default 6)')
+    archive.set_defaults(func=command_archive)
+
+    query = commands.add_parser('query', help='query the SQLite store, or count boards per depth')
+    query.add_argument('--depth', type=int, help='presses in the shortest solution')
+    query.add_argument('--button', help='first button of the shortest solution, such as C3 (needs --depth)')
+    query.add_argument('--lights', type=int, help='number of lights on')
+    query.add_argument('--count', action='store_true', help='print the number of matching boards only')
+    query.set_defaults(func=command_query)
+
+    distances = commands.add_parser('distances', help='all-pairs move distance matrix of a set of boards')
+    distances.add_argument('file', help='file of boards, one per line, or - for stdin')
+    distances.add_argument('out', help='matrix file to write, .npy or comma separated text')
+    distances.add_argument('--tile', type=int, default=1024, help='pairs gathered per tile side (default 1024)')
+    distances.add_argument('--moves', type=int, nargs=2, action='append', metavar=('I', 'J'),
+                           help='also print the moves from board I to board J of the file')
+    distances.set_defaults(func=command_distances)
+
+    export = commands.add_parser('export', help='export the solution table as .npy, Arrow IPC or NDJSON')
+    export.add_argument('format', choices=['npy', 'arrow', 'ndjson'])
+    export.add_argument('path', help='file to write, or directory for npy')
+    export.add_argument('--min-depth', type=int, help='smallest depth to export')
+    export.add_argument('--max-depth', type=int, help='largest depth to export')
+    export.set_defaults(func=command_export)
+
+    mitm = commands.add_parser('mitm', help='meet-in-the-middle solving for boards too big to tabulate')
+    mitm.add_argument('boards', nargs='*', help='integer boards to solve, or none to benchmark')
+    mitm.add_argument('--k', type=int, help='presses per half in the table (default the larger half, exact)')
+    mitm.add_argument('--bench-k', type=int, nargs='+', default=[3, 5, 7], metavar='K',
+                      help='values of k to benchmark when no boards are given (default 3 5 7)')
+    mitm.set_defaults(func=command_mitm)
+
+    verify = commands.add_parser('verify', help='check the cached solution table')
+    verify.add_argument('--thorough', action='store_true', help='also prove every depth is a shortest path')
+    verify.set_defaults(func=command_verify)
+
+    return parser
+
+
+def main(argv=None):
+    """
+    Run the command line interface.
+    :param argv: Arguments, defaulting to sys.argv.
+    :return:
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if RULES[args.rule].modulus != 2:
+        parser.error(f'--rule {args.rule} has {RULES[args.rule].modulus} states per light, '
+                     'the command line engines need two')
+    if args.func is command_query and args.button is not None:
+        if args.depth is None:
+            parser.error('query --button needs --depth')
+        if args.lights is not None:
+            parser.error('query --button cannot be combined with --lights')
+
+    tables = args.func is command_solve and (args.shards or args.archive or args.sqlite)
+    if tables and args.size * args.size > MAX_TABLE_CELLS:
+        parser.error(f'--size {args.size} is too large to tabulate, solve it without --shards, --archive or --sqlite')
+
+    # Button labels are checked against the board size here, so the commands get button indexes.
+    try:
+        if args.func is command_solve and args.forbid:
+            args.forbid = [parse_button(label, args.size, args.size) for label in args.forbid]
+        if args.func is command_query and args.button is not None:
+            args.button = parse_button(args.button, args.size, args.size)
+    except ValueError as error:
+        parser.error(str(error))
+
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
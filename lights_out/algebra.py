@@ -0,0 +1,315 @@
+"""
+Linear algebra over GF(2) for Lights Out.
+
+Every board and every set of button presses is an integer, with bit i standing for cell (or button) i. Pressing a set
+of buttons XORs their masks together, so solving a board means finding a press set whose masks XOR to the board. Any
+two solutions differ by an element of the null space of the masks, which lets us enumerate every solution of a board
+from one particular solution.
+"""
+
+from collections import namedtuple
+from functools import lru_cache
+from itertools import product
+
+Elimination = namedtuple('Elimination', ['pivots', 'null_basis'])
+Elimination.__doc__ = """
+Reduced form of a set of masks.
+pivots maps a leading bit to a (value, presses) pair, where value is the XOR of the masks in presses.
+null_basis holds press sets whose masks XOR to zero.
+"""
+
+
+@lru_cache(maxsize=32)
+def eliminate(masks):
+    """
+    Reduce the masks to echelon form, tracking which presses build each pivot.
+    :param masks: Tuple of integer masks, one per button.
+    :return: Elimination of the masks.
+    """
+    pivots = {}
+    null_basis = []
+
+    for button, mask in enumerate(masks):
+        value = mask
+        presses = 1 << button
+
+        while value:
+            lead = value.bit_length() - 1
+            if lead not in pivots:
+                pivots[lead] = (value, presses)
+                break
+
+            pivot_value, pivot_presses = pivots[lead]
+            value ^= pivot_value
+            presses ^= pivot_presses
+        else:
+            null_basis.append(presses)
+
+    return Elimination(pivots, tuple(null_basis))
+
+
+def particular_solution(board, masks):
+    """
+    Find one set of presses that solves the board.
+    :param board: Integer of board to solve.
+    :param masks: Sequence of integer masks, one per button.
+    :return: Integer press set, or None if the board is unsolvable.
+    """
+    return reduce_board(board, eliminate(tuple(masks)).pivots)
+
+
+def reduce_board(board, pivots):
+    """
+    Reduce a board by the pivots of an elimination.
+    :param board: Integer of board to solve.
+    :param pivots: Pivots of an Elimination.
+    :return: Integer press set, or None if the board is outside the span of the pivots.
+    """
+    presses = 0
+    while board:
+        lead = board.bit_length() - 1
+        if lead not in pivots:
+            return None
+
+        pivot_value, pivot_presses = pivots[lead]
+        board ^= pivot_value
+        presses ^= pivot_presses
+
+    return presses
+
+
+def gray_coset(solution, null_basis):
+    """
+    Walk every element of solution + span(null_basis) in Gray-code order, one XOR per step.
+    :param solution: Integer press set to start from.
+    :param null_basis: Sequence of integer press sets spanning the null space.
+    :return: Generator of integer press sets.
+    """
+    yield solution
+
+    for i in range(1, 1 << len(null_basis)):
+        # The lowest set bit of i is the single Gray-code bit that flips at step i.
+        solution ^= null_basis[(i & -i).bit_length() - 1]
+        yield solution
+
+
+def count_optimal_solutions(board, masks):
+    """
+    Count the minimal press sets that solve the board.
+    :param board: Integer of board to solve.
+    :param masks: Sequence of integer masks, one per button.
+    :return: Tuple of (presses needed, number of optimal solutions), or None if the board is unsolvable.
+    """
+    solution = particular_solution(board, masks)
+    if solution is None:
+        return None
+
+    best = solution.bit_count()
+    count = 0
+    for candidate in gray_coset(solution, eliminate(tuple(masks)).null_basis):
+        weight = candidate.bit_count()
+        if weight < best:
+            best = weight
+            count = 1
+        elif weight == best:
+            count += 1
+
+    return best, count
+
+
+def optimal_solutions(board, masks):
+    """
+    Lazily yield every minimal press set that solves the board.
+    :param board: Integer of board to solve.
+    :param masks: Sequence of integer masks, one per button.
+    :return: Generator of integer press sets. Empty if the board is unsolvable.
+    """
+    result = count_optimal_solutions(board, masks)
+    if result is None:
+        return
+
+    best, _ = result
+    solution = particular_solution(board, masks)
+    for candidate in gray_coset(solution, eliminate(tuple(masks)).null_basis):
+        if candidate.bit_count() == best:
+            yield candidate
+
+
+def press_list(presses):
+    """
+    Translate a press set into the list of buttons it presses.
+    :param presses: Integer press set.
+    :return: List of button indexes, lowest first.
+    """
+    buttons = []
+    while presses:
+        low = presses & -presses
+        buttons.append(low.bit_length() - 1)
+        presses ^= low
+
+    return buttons
+
+
+@lru_cache(maxsize=32)
+def eliminate_mod(masks, modulus):
+    """
+    Row reduce the cell by button matrix of the masks over GF(modulus), tracking the row operations.
+    :param masks: Tuple of integer bit board masks, one per button.
+    :param modulus: Prime number of states per light.
+    :return: Tuple of (pivot columns, reduced rows, transform rows, null basis).
+    """
+    if modulus < 2 or any(modulus % d == 0 for d in range(2, int(modulus ** 0.5) + 1)):
+        raise ValueError(f'Algebraic solving needs a prime modulus, got {modulus}')
+
+    buttons = len(masks)
+    cells = max(mask.bit_length() for mask in masks)
+    rows = [[mask >> cell & 1 for mask in masks] for cell in range(cells)]
+    transform = [[int(i == j) for j in range(cells)] for i in range(cells)]
+
+    pivot_cols = []
+    rank = 0
+    for col in range(buttons):
+        pivot = next((r for r in range(rank, cells) if rows[r][col]), None)
+        if pivot is None:
+            continue
+
+        rows[rank], rows[pivot] = rows[pivot], rows[rank]
+        transform[rank], transform[pivot] = transform[pivot], transform[rank]
+
+        inverse = pow(rows[rank][col], -1, modulus)
+        rows[rank] = [v * inverse % modulus for v in rows[rank]]
+        transform[rank] = [v * inverse % modulus for v in transform[rank]]
+
+        for r in range(cells):
+            factor = rows[r][col]
+            if r != rank and factor:
+                rows[r] = [(a - factor * b) % modulus for a, b in zip(rows[r], rows[rank])]
+                transform[r] = [(a - factor * b) % modulus for a, b in zip(transform[r], transform[rank])]
+
+        pivot_cols.append(col)
+        rank += 1
+
+    null_basis = []
+    for free in sorted(set(range(buttons)) - set(pivot_cols)):
+        vector = [0] * buttons
+        vector[free] = 1
+        for r, col in enumerate(pivot_cols):
+            vector[col] = -rows[r][free] % modulus
+        null_basis.append(tuple(vector))
+
+    return tuple(pivot_cols), rows, transform, tuple(null_basis)
+
+
+def solve_mod(digits, masks, modulus):
+    """
+    Find the fewest presses that turn every light of a k state board off.
+    :param digits: Sequence of light states, one per cell.
+    :param masks: Sequence of integer bit board masks, one per button.
+    :param modulus: Prime number of states per light.
+    :return: List of press counts per button, or None if the board is unsolvable.
+    """
+    pivot_cols, rows, transform, null_basis = eliminate_mod(tuple(masks), modulus)
+
+    # Each press adds one to every cell it touches, so the presses must sum to the negated board.
+    target = [-d % modulus for d in digits]
+    reduced = [sum(t * d for t, d in zip(row, target)) % modulus for row in transform]
+    if any(reduced[len(pivot_cols):]):
+        return None
+
+    solution = [0] * len(masks)
+    for r, col in enumerate(pivot_cols):
+        solution[col] = reduced[r]
+
+    best = solution
+    best_total = sum(solution)
+    for coefficients in product(range(modulus), repeat=len(null_basis)):
+        candidate = list(solution)
+        for coefficient, vector in zip(coefficients, null_basis):
+            if coefficient:
+                candidate = [(c + coefficient * v) % modulus for c, v in zip(candidate, vector)]
+
+        total = sum(candidate)
+        if total < best_total:
+            best, best_total = candidate, total
+
+    return best
+
+
+def solve_rule(compiled, board):
+    """
+    Find the fewest presses that solve a board under a compiled rule.
+    :param compiled: CompiledRule of the board.
+    :param board: Integer board, packed for rules with more than two states.
+    :return: List of press counts per button, or None if the board is unsolvable.
+    """
+    if compiled.modulus == 2:
+        presses = next(optimal_solutions(board, compiled.masks), None)
+        if presses is None:
+            return None
+        return [presses >> button & 1 for button in range(compiled.cells)]
+
+    return solve_mod(compiled.unpack(board), compiled.masks, compiled.modulus)
+
+
+def solve_partial(known, values, masks):
+    """
+    Find the fewest presses that solve some completion of a board with unreadable lights.
+    Only the known cells have to end up off, so the masks are restricted to those cells and the optimal solution is
+    taken over the null space of the restricted masks, which grows with every unknown cell.
+    :param known: Integer bit board of the cells whose state is known.
+    :param values: Integer board of the known cells' states. Bits outside known are ignored.
+    :param masks: Sequence of integer masks, one per button.
+    :return: Integer press set, or None if no completion of the board is solvable.
+    """
+    return next(optimal_solutions(values & known, [mask & known for mask in masks]), None)
+
+
+@lru_cache(maxsize=64)
+def eliminate_forbidden(masks, forbidden):
+    """
+    Reduce only the masks of the buttons that may be pressed. Cached per forbidden set, so repeated queries against
+    the same broken unit pay for the elimination once.
+    :param masks: Tuple of integer masks, one per button.
+    :param forbidden: Frozenset of buttons that must never be pressed.
+    :return: Tuple of (allowed buttons, Elimination of their masks).
+    """
+    allowed = tuple(button for button in range(len(masks)) if button not in forbidden)
+    return allowed, eliminate(tuple(masks[button] for button in allowed))
+
+
+def solve_forbidden(board, masks, forbidden):
+    """
+    Find the fewest presses that solve a board without pressing any forbidden button.
+    :param board: Integer of board to solve.
+    :param masks: Sequence of integer masks, one per button.
+    :param forbidden: Iterable of buttons that must never be pressed.
+    :return: Integer press set over all buttons, or None if the board can't be solved without them.
+    """
+    return solve_many_forbidden([board], masks, forbidden)[0]
+
+
+def solve_many_forbidden(boards, masks, forbidden):
+    """
+    Solve a batch of boards on one unit with broken buttons.
+    :param boards: Iterable of integer boards.
+    :param masks: Sequence of integer masks, one per button.
+    :param forbidden: Iterable of buttons that must never be pressed.
+    :return: List of integer press sets over all buttons, None for boards that can't be solved.
+    """
+    allowed, elimination = eliminate_forbidden(tuple(masks), frozenset(forbidden))
+
+    solutions = []
+    for board in boards:
+        local = reduce_board(board, elimination.pivots)
+        if local is None:
+            solutions.append(None)
+            continue
+
+        local = min(gray_coset(local, elimination.null_basis), key=int.bit_count)
+
+        presses = 0
+        for index in press_list(local):
+            presses |= 1 << allowed[index]
+        solutions.append(presses)
+
+    return solutions
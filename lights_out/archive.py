@@ -0,0 +1,151 @@
+"""
+Block compressed archives of solution tables, for shipping tables between machines.
+
+The table is cut into fixed size blocks of boards, and the buttons and depths of each block are compressed together
+with zlib. A footer at the end of the file holds the offset of every block, so a lookup only has to read and
+decompress the one block holding its board. Recently used blocks are kept decompressed in a small LRU cache.
+"""
+
+import mmap
+import random
+import struct
+import time
+import zlib
+from collections import OrderedDict
+
+from .table import FORMAT_VERSION, SolutionStore
+
+MAGIC = b'LOTZ'
+# Magic, version, rows, cols, block bits, then the rule: neighborhood name, wrap and modulus.
+HEADER = struct.Struct('<4sHHHB16s?B')
+FOOTER = struct.Struct('<QQ4s')
+DEFAULT_CACHED_BLOCKS = 32
+
+
+def write_archive(table, path, block_bits=12, level=6):
+    """
+    Write a solution table as a block compressed archive.
+    :param table: SolutionTable to archive.
+    :param path: File path to write.
+    :param block_bits: Each block holds 2 ** block_bits boards.
+    :param level: zlib compression level.
+    :return:
+    """
+    compiled = table.compiled
+    block_bits = min(block_bits, compiled.cells)
+    block_size = 1 << block_bits
+
+    with open(path, 'wb') as file:
+        rule = compiled.rule
+        file.write(HEADER.pack(MAGIC, FORMAT_VERSION, compiled.rows, compiled.cols, block_bits,
+                               rule.neighborhood.encode(), rule.wrap, rule.modulus))
+
+        offsets = []
+        for start in range(0, 1 << compiled.cells, block_size):
+            offsets.append(file.tell())
+            file.write(zlib.compress(
+                bytes(table.buttons[start:start + block_size]) + bytes(table.depths[start:start + block_size]),
+                level
+            ))
+        offsets.append(file.tell())
+
+        index_offset = file.tell()
+        file.write(struct.pack(f'<{len(offsets)}Q', *offsets))
+        file.write(FOOTER.pack(index_offset, len(offsets) - 1, MAGIC))
+
+
+class ArchiveTable(SolutionStore):
+    """
+    Solution storage reading from a block compressed archive, decompressing blocks on demand.
+    """
+
+    def __init__(self, path, compiled, cached_blocks=DEFAULT_CACHED_BLOCKS):
+        """
+        :param path: Path of an archive written by write_archive.
+        :param compiled: CompiledRule the table was generated for.
+        :param cached_blocks: Number of decompressed blocks to keep.
+        """
+        super().__init__(compiled)
+
+        with open(path, 'rb') as file:
+            self.mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, rows, cols, block_bits, neighborhood, wrap, modulus = HEADER.unpack_from(self.mapped)
+        if magic != MAGIC or version != FORMAT_VERSION or (rows, cols) != (compiled.rows, compiled.cols):
+            raise ValueError(f'{path} is not a version {FORMAT_VERSION} archive of this board')
+        rule = compiled.rule
+        if (neighborhood.rstrip(b'\0'), wrap, modulus) != (rule.neighborhood.encode(), rule.wrap, rule.modulus):
+            raise ValueError(f'{path} is an archive for another rule than {tuple(rule)!r}')
+
+        index_offset, block_count, magic = FOOTER.unpack_from(self.mapped, len(self.mapped) - FOOTER.size)
+        if magic != MAGIC:
+            raise ValueError(f'{path} is truncated')
+
+        self.offsets = struct.unpack_from(f'<{block_count + 1}Q', self.mapped, index_offset)
+        self.block_bits = block_bits
+        self.block_size = 1 << block_bits
+        self.block_mask = self.block_size - 1
+
+        self.cached_blocks = cached_blocks
+        self.blocks = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def load_block(self, block):
+        """
+        Return a decompressed block, buttons followed by depths.
+        :param block: Block number.
+        :return: Bytes of the block.
+        """
+        data = self.blocks.get(block)
+        if data is not None:
+            self.hits += 1
+            self.blocks.move_to_end(block)
+            return data
+
+        self.misses += 1
+        data = zlib.decompress(self.mapped[self.offsets[block]:self.offsets[block + 1]])
+        self.blocks[block] = data
+        if len(self.blocks) > self.cached_blocks:
+            self.blocks.popitem(last=False)
+
+        return data
+
+    def lookup(self, board):
+        data = self.load_block(board >> self.block_bits)
+        offset = board & self.block_mask
+        return data[offset], data[self.block_size + offset]
+
+    def compressed_size(self):
+        """
+        :return: Size of the archive file in bytes.
+        """
+        return len(self.mapped)
+
+
+def benchmark(table, archive, samples=2000, seed=0):
+    """
+    Compare the size and solve latency of an archive against the uncompressed memory mapped table.
+    :param table: SolutionTable loaded from the uncompressed table file.
+    :param archive: ArchiveTable of the same table.
+    :param samples: Number of random solvable boards to solve.
+    :param seed: Random seed for choosing the boards.
+    :return: Dictionary of sizes, compression ratio and mean microseconds per solve.
+    """
+    reachable = table.reachable()
+    rng = random.Random(seed)
+    boards = [int(reachable[rng.randrange(reachable.size)]) for _ in range(samples)]
+
+    results = {
+        'table_bytes': 2 * len(table.buttons),
+        'archive_bytes': archive.compressed_size(),
+    }
+    results['ratio'] = results['table_bytes'] / results['archive_bytes']
+
+    for name, store in (('table', table), ('archive', archive)):
+        start = time.perf_counter()
+        for board in boards:
+            store.path(board)
+        results[f'{name}_us'] = (time.perf_counter() - start) / samples * 1e6
+
+    return results
@@ -0,0 +1,156 @@
+"""
+Canvas widget that draws a Lights Out board straight from its integer value.
+"""
+
+import tkinter as tk
+
+from .render import row_label
+
+LIGHT_ON = '#f5d442'
+LIGHT_OFF = '#3a3a3a'
+LIGHT_UNKNOWN = '#9a9a9a'
+HIGHLIGHT = '#e0312b'
+OUTLINE = '#1e1e1e'
+
+
+class BoardCanvas(tk.Canvas):
+    """
+    Single canvas holding every light of the board. Only lights that changed are redrawn.
+    Lights are off, on or, for boards read off a worn handheld, unknown. Clicking a light cycles it through the three.
+    """
+
+    def __init__(self, master, rows, cols, cell_size=None, command=None):
+        """
+        Draw an empty board.
+        :param master: Parent widget.
+        :param rows: Number of rows on the board.
+        :param cols: Number of columns on the board.
+        :param cell_size: Size of each light in pixels. Defaults to fit the board in about 400 pixels.
+        :param command: Called with the cell index when a light is clicked. Defaults to cycling the light.
+        """
+        self.rows = rows
+        self.cols = cols
+        self.cell_size = cell_size or max(6, min(40, 400 // max(rows, cols)))
+        self.margin = self.cell_size if self.cell_size >= 16 else 0
+        self.command = command
+        self.enabled = False
+
+        super().__init__(
+            master=master,
+            width=self.margin + cols * self.cell_size + 1,
+            height=self.margin + rows * self.cell_size + 1,
+            highlightthickness=0
+        )
+
+        self.board = 0
+        self.unknown = 0
+        self.highlighted = None
+        self.cells = []
+
+        self.draw_labels()
+        gap = 1 if self.cell_size < 16 else 3
+        for i in range(rows * cols):
+            x, y = self.cell_origin(i)
+            self.cells.append(self.create_oval(
+                x + gap, y + gap, x + self.cell_size - gap, y + self.cell_size - gap,
+                fill=LIGHT_OFF,
+                outline=OUTLINE
+            ))
+
+        self.bind('<Button-1>', self.on_click)
+
+    def draw_labels(self):
+        """
+        Draw the row letters and column numbers in the margin, when there is room for them.
+        :return:
+        """
+        if not self.margin:
+            return
+
+        half = self.cell_size // 2
+        for col in range(self.cols):
+            self.create_text(self.margin + col * self.cell_size + half, half, text=col + 1)
+        for row in range(self.rows):
+            self.create_text(half, self.margin + row * self.cell_size + half, text=row_label(row))
+
+    def cell_origin(self, cell):
+        """
+        Return the top left pixel of a cell.
+        :param cell: Cell index.
+        :return: Tuple of (x, y).
+        """
+        row, col = divmod(cell, self.cols)
+        return self.margin + col * self.cell_size, self.margin + row * self.cell_size
+
+    def cell_at(self, x, y):
+        """
+        Return the cell under a pixel.
+        :param x: Canvas x coordinate.
+        :param y: Canvas y coordinate.
+        :return: Cell index, or None if the pixel is outside the board.
+        """
+        col = (x - self.margin) // self.cell_size
+        row = (y - self.margin) // self.cell_size
+        if x < self.margin or y < self.margin or not (0 <= row < self.rows and 0 <= col < self.cols):
+            return None
+
+        return row * self.cols + col
+
+    def on_click(self, event):
+        """
+        Handle a click on the board.
+        :param event: Tkinter click event.
+        :return:
+        """
+        if not self.enabled:
+            return
+
+        cell = self.cell_at(event.x, event.y)
+        if cell is None:
+            return
+
+        if self.command is None:
+            bit = 1 << cell
+            if self.unknown & bit:
+                self.set_board(self.board, self.unknown ^ bit)
+            elif self.board & bit:
+                self.set_board(self.board ^ bit, self.unknown ^ bit)
+            else:
+                self.set_board(self.board ^ bit, self.unknown)
+        else:
+            self.command(cell)
+
+    def set_board(self, board, unknown=0):
+        """
+        Show a board, redrawing only the lights that changed.
+        :param board: Integer of board to show.
+        :param unknown: Integer bit board of lights whose state is unknown.
+        :return:
+        """
+        board = int(board)
+        dirty = (self.board ^ board) | (self.unknown ^ unknown)
+        self.board = board
+        self.unknown = unknown
+
+        while dirty:
+            low = dirty & -dirty
+            cell = low.bit_length() - 1
+            if unknown & low:
+                fill = LIGHT_UNKNOWN
+            else:
+                fill = LIGHT_ON if board & low else LIGHT_OFF
+            self.itemconfig(self.cells[cell], fill=fill)
+            dirty ^= low
+
+    def highlight(self, cell):
+        """
+        Outline a single cell, such as the next button to press.
+        :param cell: Cell index to outline, or None to clear the outline.
+        :return:
+        """
+        if self.highlighted is not None:
+            self.itemconfig(self.cells[self.highlighted], outline=OUTLINE, width=1)
+
+        self.highlighted = cell
+        if cell is not None:
+            self.itemconfig(self.cells[cell], outline=HIGHLIGHT, width=3)
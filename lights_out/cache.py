@@ -0,0 +1,257 @@
+"""
+On-disk cache of generated solution tables.
+
+Every (rows, cols, rule, format version) combination gets its own table file in the cache directory. A manifest
+records the size and last access time of each table, so the least recently used tables can be evicted to keep the
+directory under a byte budget. Generation happens under a per-table file lock, so when several processes ask for the
+same missing table only the first one builds it and the rest wait for it to land. Tables are verified every time they
+are loaded, and a corrupt or stale table is thrown away and generated again.
+"""
+
+import json
+import os
+import time
+from contextlib import contextmanager
+
+from .rules import CLASSIC, compile_rule
+from .sqlite_store import SQLiteStore, write_sqlite
+from .table import FORMAT_VERSION, check_tabulable, generate_table, load_table
+from .verify import verify_table
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+DEFAULT_DIRECTORY = os.environ.get(
+    'LIGHTS_OUT_CACHE', os.path.join(os.path.expanduser('~'), '.cache', 'lights_out')
+)
+DEFAULT_MAX_BYTES = 1 << 30
+MANIFEST = 'manifest.json'
+
+
+@contextmanager
+def file_lock(path):
+    """
+    Hold an exclusive lock on a lock file for the duration of the with block.
+    :param path: Path of the lock file, created if missing.
+    :return:
+    """
+    with open(path, 'a+b') as file:
+        if fcntl is not None:
+            fcntl.flock(file.fileno(), fcntl.LOCK_EX)
+        else:
+            file.seek(0)
+            msvcrt.locking(file.fileno(), msvcrt.LK_LOCK, 1)
+
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(file.fileno(), fcntl.LOCK_UN)
+            else:
+                file.seek(0)
+                msvcrt.locking(file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def file_identity(path):
+    """
+    Identify the file currently at a path, which changes whenever the file is replaced.
+    :param path: File path.
+    :return: Tuple of device, inode, size and modification time, or None if there is no file.
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+
+def table_name(rows, cols, rule, extension='lot'):
+    """
+    Return the cache file name of a table.
+    :param rows: Number of rows on the board.
+    :param cols: Number of columns on the board.
+    :param rule: Rule the table solves.
+    :param extension: File extension of the storage format.
+    :return: File name.
+    """
+    edges = 'wrap' if rule.wrap else 'flat'
+    return f'{rows}x{cols}-{rule.neighborhood}-{edges}-mod{rule.modulus}-v{FORMAT_VERSION}.{extension}'
+
+
+class TableCache:
+    """
+    Directory of solution tables bounded by a byte budget.
+    """
+
+    def __init__(self, directory=DEFAULT_DIRECTORY, max_bytes=DEFAULT_MAX_BYTES, verify=True):
+        """
+        :param directory: Directory holding the tables. Created if missing.
+        :param max_bytes: Total size of tables to keep before evicting the least recently used.
+        :param verify: Check every table as it is loaded.
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.verify = verify
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, name):
+        """
+        :param name: File name within the cache.
+        :return: Full path of the file.
+        """
+        return os.path.join(self.directory, name)
+
+    def read_manifest(self):
+        """
+        :return: Manifest dictionary mapping table names to their size and last access time.
+        """
+        try:
+            with open(self.path(MANIFEST)) as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return {}
+
+    def write_manifest(self, manifest):
+        """
+        Atomically replace the manifest.
+        :param manifest: Manifest dictionary.
+        :return:
+        """
+        temp_path = self.path(f'{MANIFEST}.{os.getpid()}.tmp')
+        with open(temp_path, 'w') as file:
+            json.dump(manifest, file, indent=1)
+        os.replace(temp_path, self.path(MANIFEST))
+
+    def touch(self, name):
+        """
+        Record an access to a table, then evict old tables if the cache is over budget.
+        :param name: File name of the table.
+        :return:
+        """
+        with file_lock(self.path(f'{MANIFEST}.lock')):
+            manifest = self.read_manifest()
+            manifest[name] = {'size': os.path.getsize(self.path(name)), 'last_access': time.time()}
+            self.evict(manifest, keep=name)
+            self.write_manifest(manifest)
+
+    def evict(self, manifest, keep=None):
+        """
+        Delete least recently used tables until the cache is within budget. Called with the manifest lock held.
+        :param manifest: Manifest dictionary, updated in place.
+        :param keep: Table name that must not be evicted.
+        :return: List of evicted table names.
+        """
+        for name in [name for name in manifest if not os.path.exists(self.path(name))]:
+            del manifest[name]
+
+        evicted = []
+        total = sum(entry['size'] for entry in manifest.values())
+        for name in sorted(manifest, key=lambda n: manifest[n]['last_access']):
+            if total <= self.max_bytes:
+                break
+            if name == keep:
+                continue
+
+            # Hold the table's own lock so it isn't deleted while another process is writing it.
+            with file_lock(self.path(f'{name}.lock')):
+                try:
+                    os.remove(self.path(name))
+                except OSError:
+                    # Still mapped by a process on a platform that forbids deleting open files.
+                    continue
+
+            total -= manifest.pop(name)['size']
+            evicted.append(name)
+
+        return evicted
+
+    def get_file(self, name, build):
+        """
+        Return the path of a cached file, building it first if it is missing.
+        :param name: File name within the cache.
+        :param build: Callable given a temporary path to write the file to.
+        :return: Path of the file.
+        """
+        path = self.path(name)
+
+        with file_lock(self.path(f'{name}.lock')):
+            if not os.path.exists(path):
+                temp_path = f'{path}.{os.getpid()}.tmp'
+                try:
+                    build(temp_path)
+                    os.replace(temp_path, path)
+                finally:
+                    if os.path.exists(temp_path):
+                        os.remove(temp_path)
+
+        self.touch(name)
+        return path
+
+    def get(self, rows, cols, rule=CLASSIC, progress=None):
+        """
+        Return the solution table of a board size and rule, generating it on first use.
+        :param rows: Number of rows on the board.
+        :param cols: Number of columns on the board.
+        :param rule: Rule to solve.
+        :param progress: Optional callable passed to generate_table.
+        :return: SolutionTable.
+        """
+        compiled = compile_rule(rows, cols, rule)
+        check_tabulable(compiled)
+
+        def build(temp_path):
+            generate_table(compiled, progress).save(temp_path)
+
+        name = table_name(rows, cols, rule)
+        for _ in range(2):
+            # Errors while generating propagate as they are, only a table that fails to load or verify is rebuilt.
+            path = self.get_file(name, build)
+            identity = file_identity(path)
+            try:
+                table = load_table(path, compiled)
+                problems = verify_table(table) if self.verify else []
+            except ValueError as error:
+                problems = [str(error)]
+
+            if not problems:
+                return table
+
+            # Drop the mapping first, some platforms refuse to delete a mapped file.
+            table = None
+            self.discard(name, identity)
+
+        raise ValueError(f'Generated table {name} failed verification: ' + '; '.join(problems))
+
+    def discard(self, name, identity=None):
+        """
+        Delete a cached file so it is built again on next use.
+        :param name: File name within the cache.
+        :param identity: Optional file_identity of the bad copy. A file another process has replaced it with is kept.
+        :return:
+        """
+        path = self.path(name)
+        with file_lock(self.path(f'{name}.lock')):
+            # Another process may have discarded and rebuilt the same bad table already.
+            current = file_identity(path)
+            if current is not None and (identity is None or current == identity):
+                os.remove(path)
+
+    def get_sqlite(self, rows, cols, rule=CLASSIC, progress=None):
+        """
+        Return the SQLite store of a board size and rule, writing it from the solution table on first use.
+        :param rows: Number of rows on the board.
+        :param cols: Number of columns on the board.
+        :param rule: Rule to solve.
+        :param progress: Optional callable passed to generate_table.
+        :return: SQLiteStore.
+        """
+        compiled = compile_rule(rows, cols, rule)
+        check_tabulable(compiled)
+
+        def build(temp_path):
+            write_sqlite(self.get(rows, cols, rule, progress), temp_path)
+
+        return SQLiteStore(self.get_file(table_name(rows, cols, rule, 'sqlite'), build), compiled)
@@ -0,0 +1,46 @@
+"""
+Move distances between boards.
+
+Presses commute and each press undoes itself, so the fewest presses turning board A into board B are the fewest
+presses solving A XOR B. A table of depths therefore gives the distance between any two boards with one lookup, and a
+whole distance matrix with one vectorized gather per tile of board pairs.
+"""
+
+import numpy as np
+
+DEFAULT_TILE = 1024
+
+
+def distance_matrix(table, boards, tile=DEFAULT_TILE):
+    """
+    Compute the move distance between every pair of boards.
+    :param table: SolutionTable of the board size and rule.
+    :param boards: Sequence of integer boards.
+    :param tile: Side of the square tiles of pairs gathered at once, bounding the temporary memory.
+    :return: K x K uint8 NumPy array. UNREACHABLE marks pairs that can't be turned into each other.
+    """
+    depths = table.arrays()[1]
+    boards = np.asarray(boards, dtype=np.int64)
+    count = boards.size
+    matrix = np.empty((count, count), dtype=np.uint8)
+
+    for row in range(0, count, tile):
+        rows = boards[row:row + tile, None]
+        for col in range(row, count, tile):
+            block = depths[rows ^ boards[None, col:col + tile]]
+            matrix[row:row + tile, col:col + tile] = block
+            # The distance is symmetric, so the tile below the diagonal is the transpose.
+            matrix[col:col + tile, row:row + tile] = block.T
+
+    return matrix
+
+
+def moves_between(table, start, end):
+    """
+    Return the buttons of a shortest sequence of presses turning one board into another.
+    :param table: SolutionStore of the board size and rule.
+    :param start: Integer board to start from.
+    :param end: Integer board to reach.
+    :return: List of button indexes, or None if the boards can't be turned into each other.
+    """
+    return table.path(start ^ end)
@@ -0,0 +1,138 @@
+"""
+Exporters of solution tables for downstream jobs.
+
+All exporters work on the table buffers a chunk at a time, so memory use stays flat however large the table is, and
+all of them can keep only the boards within a range of depths. The whole table can be written to NumPy .npy files
+straight from its buffers. Filtered exports and the Arrow IPC and NDJSON formats hold one row per solvable board with
+its board, first button and depth.
+"""
+
+import os
+
+import numpy as np
+
+from .table import UNREACHABLE
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+CHUNK = 1 << 20
+
+
+def iter_rows(table, min_depth=0, max_depth=UNREACHABLE - 1, chunk=CHUNK):
+    """
+    Yield the solvable boards of a table within a depth range, a chunk of the table at a time.
+    :param table: SolutionTable to read.
+    :param min_depth: Smallest depth to keep.
+    :param max_depth: Largest depth to keep.
+    :param chunk: Number of table entries read per chunk.
+    :return: Generator of (boards, buttons, depths) NumPy array tuples.
+    """
+    buttons, depths = table.arrays()
+    board_type = np.uint32 if table.compiled.cells <= 32 else np.uint64
+
+    for start in range(0, depths.size, chunk):
+        chunk_depths = depths[start:start + chunk]
+        keep = np.flatnonzero((chunk_depths >= min_depth) & (chunk_depths <= max_depth))
+        if keep.size:
+            yield (keep + start).astype(board_type), buttons[start:start + chunk][keep], chunk_depths[keep]
+
+
+def write_npy_stream(path, dtype, count, arrays):
+    """
+    Write a one dimensional .npy file from a stream of arrays without holding them all in memory.
+    :param path: File path to write.
+    :param dtype: NumPy dtype of the column.
+    :param count: Total number of elements the arrays hold.
+    :param arrays: Iterable of NumPy arrays to write in order.
+    :return:
+    """
+    with open(path, 'wb') as file:
+        np.lib.format.write_array_header_1_0(
+            file, {'descr': np.lib.format.dtype_to_descr(np.dtype(dtype)), 'fortran_order': False, 'shape': (count,)}
+        )
+        for array in arrays:
+            file.write(memoryview(np.ascontiguousarray(array, dtype=dtype)))
+
+
+def export_npy(table, directory, min_depth=None, max_depth=None):
+    """
+    Export a table as .npy files. Unfiltered, buttons.npy and depths.npy are written straight from the table buffers,
+    indexed by board. Filtered by depth, boards.npy, buttons.npy and depths.npy hold one row per kept board.
+    :param table: SolutionTable to export.
+    :param directory: Directory to write the files to. Created if missing.
+    :param min_depth: Optional smallest depth to keep.
+    :param max_depth: Optional largest depth to keep.
+    :return: List of paths written.
+    """
+    os.makedirs(directory, exist_ok=True)
+    paths = [os.path.join(directory, f'{name}.npy') for name in ('boards', 'buttons', 'depths')]
+
+    if min_depth is None and max_depth is None:
+        write_npy_stream(paths[1], np.uint8, len(table.buttons), [table.arrays()[0]])
+        write_npy_stream(paths[2], np.uint8, len(table.depths), [table.arrays()[1]])
+        return paths[1:]
+
+    bounds = (0 if min_depth is None else min_depth, UNREACHABLE - 1 if max_depth is None else max_depth)
+    count = sum(boards.size for boards, _, _ in iter_rows(table, *bounds))
+    board_type = np.uint32 if table.compiled.cells <= 32 else np.uint64
+
+    for column, (path, dtype) in enumerate(zip(paths, (board_type, np.uint8, np.uint8))):
+        write_npy_stream(path, dtype, count, (rows[column] for rows in iter_rows(table, *bounds)))
+
+    return paths
+
+
+def export_arrow(table, path, min_depth=None, max_depth=None):
+    """
+    Export the solvable boards of a table as an Arrow IPC file of board, button and depth columns.
+    :param table: SolutionTable to export.
+    :param path: File path to write.
+    :param min_depth: Optional smallest depth to keep.
+    :param max_depth: Optional largest depth to keep.
+    :return:
+    """
+    if pa is None:
+        raise ImportError('Arrow export needs the pyarrow package')
+
+    bounds = (0 if min_depth is None else min_depth, UNREACHABLE - 1 if max_depth is None else max_depth)
+    board_type = pa.uint32() if table.compiled.cells <= 32 else pa.uint64()
+    schema = pa.schema([('board', board_type), ('button', pa.uint8()), ('depth', pa.uint8())])
+
+    with pa.OSFile(path, 'wb') as sink, pa.ipc.new_file(sink, schema) as writer:
+        for boards, buttons, depths in iter_rows(table, *bounds):
+            # pa.array wraps primitive NumPy arrays without copying them.
+            writer.write_batch(pa.record_batch([pa.array(boards), pa.array(buttons), pa.array(depths)], schema=schema))
+
+
+def iter_ndjson(table, min_depth=None, max_depth=None):
+    """
+    Yield the solvable boards of a table as newline delimited JSON, one chunk of text at a time.
+    :param table: SolutionTable to export.
+    :param min_depth: Optional smallest depth to keep.
+    :param max_depth: Optional largest depth to keep.
+    :return: Generator of strings, each holding whole lines.
+    """
+    bounds = (0 if min_depth is None else min_depth, UNREACHABLE - 1 if max_depth is None else max_depth)
+
+    for boards, buttons, depths in iter_rows(table, *bounds):
+        yield ''.join(
+            f'{{"board": {board}, "button": {"null" if depth == 0 else button}, "depth": {depth}}}\n'
+            for board, button, depth in zip(boards.tolist(), buttons.tolist(), depths.tolist())
+        )
+
+
+def export_ndjson(table, path, min_depth=None, max_depth=None):
+    """
+    Write the solvable boards of a table as newline delimited JSON.
+    :param table: SolutionTable to export.
+    :param path: File path to write.
+    :param min_depth: Optional smallest depth to keep.
+    :param max_depth: Optional largest depth to keep.
+    :return:
+    """
+    with open(path, 'w') as file:
+        for text in iter_ndjson(table, min_depth, max_depth):
+            file.write(text)
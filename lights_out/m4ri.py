@@ -0,0 +1,263 @@
+"""
+Bit-packed GF(2) elimination for huge boards, using the Method of Four Russians.
+
+For an N x N board the masks form an N^2 x N^2 matrix over GF(2), 10,000 x 10,000 at N = 100. The matrix is packed into
+rows of uint64 words and augmented with the identity, so reducing it also records the row operations. Columns are
+eliminated k at a time: the k pivot rows of a block are combined into a table of all 2^k of their XOR-sums, built
+with one row XOR per entry in Gray-code order, and every other row is then cleared with a single table lookup and XOR
+instead of up to k separate row XORs.
+
+The result is a solving matrix taking a board to one particular solution, a basis of the null space and the checks
+that tell solvable boards apart. The solving and check matrices are stored with one row per cell, so solving a board
+is the XOR of the rows of its lit cells. They are cached on disk per board size and rule, so only the first solve on a
+large board pays for the elimination.
+"""
+
+import numpy as np
+
+from .algebra import gray_coset
+from .cache import TableCache, table_name
+from .rules import CLASSIC, compile_rule
+
+DEFAULT_K = 8
+TRANSPOSE_CHUNK = 1024
+
+
+def pack_rows(rows, words):
+    """
+    Pack integer bit rows into a uint64 matrix.
+    :param rows: Sequence of integer rows, bit i being column i.
+    :param words: Number of uint64 words per row.
+    :return: NumPy uint64 array of shape (len(rows), words).
+    """
+    data = b''.join(row.to_bytes(words * 8, 'little') for row in rows)
+    return np.frombuffer(data, dtype='<u8').astype(np.uint64).reshape(len(rows), words)
+
+
+def unpack_row(row):
+    """
+    Unpack a row of uint64 words into an integer.
+    :param row: NumPy uint64 array.
+    :return: Integer with bit i holding column i.
+    """
+    return int.from_bytes(row.astype('<u8').tobytes(), 'little')
+
+
+def column_bits(matrix, col):
+    """
+    :param matrix: Packed uint64 matrix.
+    :param col: Column index.
+    :return: NumPy uint64 array of the column's bit in every row.
+    """
+    return (matrix[:, col >> 6] >> np.uint64(col & 63)) & np.uint64(1)
+
+
+def transpose_bits(matrix, columns, positions, width):
+    """
+    Transpose a packed matrix, a chunk of columns at a time to bound the unpacked bits held in memory.
+    :param matrix: Packed uint64 matrix, one row per entry of positions.
+    :param columns: Number of leading columns of the matrix to transpose, one output row each.
+    :param positions: Output column of each matrix row.
+    :param width: Number of output columns.
+    :return: Packed uint64 matrix of shape (columns, words of width).
+    """
+    words = (width + 63) // 64
+    positions = np.asarray(positions, dtype=np.int64)
+    result = np.zeros((columns, words), dtype=np.uint64)
+
+    for start in range(0, columns, TRANSPOSE_CHUNK):
+        stop = min(start + TRANSPOSE_CHUNK, columns)
+        packed = matrix[:, start >> 6:(stop + 63) >> 6].astype('<u8')
+        bits = np.unpackbits(packed.view(np.uint8), axis=1, bitorder='little')[:, :stop - start]
+
+        transposed = np.zeros((stop - start, words * 64), dtype=np.uint8)
+        transposed[:, positions] = bits.T
+        result[start:stop] = np.packbits(transposed, axis=1, bitorder='little').view('<u8')
+
+    return result
+
+
+def rref(matrix, columns, k=DEFAULT_K):
+    """
+    Reduce a packed matrix to reduced row echelon form in place, k columns at a time.
+    :param matrix: Packed uint64 matrix, modified in place.
+    :param columns: Number of leading columns to pivot on. Columns past these are carried along.
+    :param k: Number of columns eliminated per Four Russians table.
+    :return: List of pivot columns, the pivot of row r being entry r.
+    """
+    row_count = matrix.shape[0]
+    pivots = []
+    rank = 0
+
+    for block in range(0, columns, k):
+        if rank == row_count:
+            break
+
+        # Find the block's pivots on a small window of bits, updating full rows only among the pivots themselves.
+        window_cols = list(range(block, min(block + k, columns)))
+        window = np.zeros(row_count - rank, dtype=np.uint32)
+        for j, col in enumerate(window_cols):
+            window |= column_bits(matrix[rank:], col).astype(np.uint32) << np.uint32(j)
+
+        block_pivots = []
+        for j, col in enumerate(window_cols):
+            found = len(block_pivots)
+            candidates = np.flatnonzero((window[found:] >> np.uint32(j)) & np.uint32(1))
+            if not candidates.size:
+                continue
+
+            pivot = found + int(candidates[0])
+            top = rank + found
+            if pivot != found:
+                matrix[[top, rank + pivot]] = matrix[[rank + pivot, top]]
+                window[[found, pivot]] = window[[pivot, found]]
+
+            below = found + 1 + np.flatnonzero((window[found + 1:] >> np.uint32(j)) & np.uint32(1))
+            window[below] ^= window[found]
+            block_pivots.append(col)
+
+        if not block_pivots:
+            continue
+
+        count = len(block_pivots)
+        start_word = block >> 6
+        pivot_rows = matrix[rank:rank + count, start_word:]
+
+        # Reduce the pivot rows against each other so they are the identity on the pivot columns.
+        def has_bit(row, col):
+            return int(pivot_rows[row, (col >> 6) - start_word] >> np.uint64(col & 63)) & 1
+
+        for t in range(count):
+            for u in range(t):
+                if has_bit(t, block_pivots[u]):
+                    pivot_rows[t] ^= pivot_rows[u]
+        for t in range(count - 1, -1, -1):
+            for u in range(t):
+                if has_bit(u, block_pivots[t]):
+                    pivot_rows[u] ^= pivot_rows[t]
+
+        table = np.zeros((1 << count, pivot_rows.shape[1]), dtype=np.uint64)
+        for i in range(1, 1 << count):
+            low = i & -i
+            table[i] = table[i ^ low] ^ pivot_rows[low.bit_length() - 1]
+
+        index = np.zeros(row_count, dtype=np.int64)
+        for t, col in enumerate(block_pivots):
+            index |= column_bits(matrix, col).astype(np.int64) << t
+        index[rank:rank + count] = 0
+
+        changed = np.flatnonzero(index)
+        matrix[changed, start_word:] ^= table[index[changed]]
+
+        pivots.extend(block_pivots)
+        rank += count
+
+    return pivots
+
+
+def solver_matrices(compiled, k=DEFAULT_K):
+    """
+    Eliminate the masks of a compiled rule into the matrices needed to solve any board.
+    :param compiled: CompiledRule with two states per light.
+    :param k: Number of columns eliminated per Four Russians table.
+    :return: Dictionary of packed uint64 matrices: the inverse rows of the lit cells XOR to a particular solution,
+        null_basis spans the presses that change nothing, and the check rows of the lit cells of a solvable board XOR
+        to zero.
+    """
+    if compiled.modulus != 2:
+        raise ValueError('Bit-packed elimination needs a rule with two states per light')
+
+    cells = buttons = compiled.cells
+    button_words = (buttons + 63) // 64
+    cell_words = (cells + 63) // 64
+
+    # Row i of the system holds the buttons that toggle cell i, augmented with row i of the identity.
+    cell_rows = [0] * cells
+    for button, mask in enumerate(compiled.masks):
+        while mask:
+            low = mask & -mask
+            cell_rows[low.bit_length() - 1] |= 1 << button
+            mask ^= low
+    matrix = pack_rows(
+        [row | 1 << button_words * 64 + i for i, row in enumerate(cell_rows)], button_words + cell_words
+    )
+
+    pivots = rref(matrix, buttons, k)
+    rank = len(pivots)
+    reduced = matrix[:rank, :button_words]
+    transform = matrix[:, button_words:]
+
+    # Row r of the transform gives the value of button pivots[r] as a parity of the cells, and its remaining rows are
+    # the checks. Transposed, every cell holds the buttons and checks it flips.
+    inverse = transpose_bits(transform[:rank], cells, pivots, buttons)
+    checks = transpose_bits(transform[rank:], cells, range(cells - rank), cells - rank)
+
+    free = sorted(set(range(buttons)) - set(pivots))
+    pivot_array = np.array(pivots, dtype=np.int64)
+    null_basis = np.zeros((len(free), button_words), dtype=np.uint64)
+    for i, col in enumerate(free):
+        null_basis[i, col >> 6] |= np.uint64(1 << (col & 63))
+        for pivot in pivot_array[np.flatnonzero(column_bits(reduced, col))]:
+            null_basis[i, pivot >> 6] |= np.uint64(1 << int(pivot & 63))
+
+    return {'inverse': inverse, 'null_basis': null_basis, 'checks': checks}
+
+
+class LargeBoardSolver:
+    """
+    Algebraic solver for boards too big to tabulate, backed by cached bit-packed eliminations.
+    """
+
+    def __init__(self, rows, cols, rule=CLASSIC, cache=None, k=DEFAULT_K):
+        """
+        Load the solving matrices of a board size and rule, eliminating them on first use.
+        :param rows: Number of rows on the board.
+        :param cols: Number of columns on the board.
+        :param rule: Rule to solve.
+        :param cache: TableCache to keep the matrices in. Defaults to the standard cache.
+        :param k: Number of columns eliminated per Four Russians table.
+        """
+        self.compiled = compile_rule(rows, cols, rule)
+        cache = TableCache() if cache is None else cache
+
+        def build(temp_path):
+            with open(temp_path, 'wb') as file:
+                np.savez(file, **solver_matrices(self.compiled, k))
+
+        with np.load(cache.get_file(table_name(rows, cols, rule, 'gf2cells.npz'), build)) as data:
+            self.inverse = data['inverse']
+            self.checks = data['checks']
+            self.null_basis = [unpack_row(row) for row in data['null_basis']]
+
+    def lit_cells(self, board):
+        """
+        :param board: Integer board.
+        :return: NumPy array of the indexes of the lights that are on.
+        """
+        data = np.frombuffer(board.to_bytes((self.compiled.cells + 7) // 8, 'little'), dtype=np.uint8)
+        return np.flatnonzero(np.unpackbits(data, bitorder='little'))
+
+    def particular_solution(self, board):
+        """
+        Find one set of presses that solves the board.
+        :param board: Integer of board to solve.
+        :return: Integer press set, or None if the board is unsolvable.
+        """
+        lit = self.lit_cells(board)
+        if self.checks.size and np.bitwise_xor.reduce(self.checks[lit], axis=0).any():
+            return None
+
+        return unpack_row(np.bitwise_xor.reduce(self.inverse[lit], axis=0))
+
+    def solve(self, board, max_nullity=20):
+        """
+        Find the fewest presses that solve the board, searching the whole null space when it is small enough.
+        :param board: Integer of board to solve.
+        :param max_nullity: Largest null space dimension to search. Past it the particular solution is returned.
+        :return: Integer press set, or None if the board is unsolvable.
+        """
+        solution = self.particular_solution(board)
+        if solution is None or len(self.null_basis) > max_nullity:
+            return solution
+
+        return min(gray_coset(solution, self.null_basis), key=int.bit_count)
@@ -0,0 +1,146 @@
+"""
+Memoized solutions for the hot solve path.
+
+Requests are heavily skewed towards a few thousand popular boards, so the press sequence of recent solutions is kept in
+a bounded LRU cache, along with the rendered text once a caller has asked for it. One shared instance serves the
+window, the command line batch mode and anything else solving in the same process.
+"""
+
+import sys
+from collections import OrderedDict
+
+from .render import solution_string
+
+DEFAULT_MAX_ENTRIES = 4096
+DEFAULT_MAX_BYTES = 16 << 20
+
+
+class SolveCache:
+    """
+    LRU cache of solved boards bounded by entry count and approximate bytes.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES):
+        """
+        :param max_entries: Most solutions to keep.
+        :param max_bytes: Most bytes of press sequences and text to keep.
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def entry_size(buttons, text):
+        """
+        :return: Approximate memory held by a cached solution.
+        """
+        return (sys.getsizeof(text) if text is not None else 0) + (
+            sys.getsizeof(buttons) if buttons is not None else 0)
+
+    def evict(self):
+        """
+        Drop least recently used solutions until the cache is within both bounds.
+        :return:
+        """
+        while self.entries and (len(self.entries) > self.max_entries or self.bytes > self.max_bytes):
+            self.bytes -= self.entries.popitem(last=False)[1][2]
+            self.evictions += 1
+
+    def entry(self, store, board):
+        """
+        Return the cached entry of a board, solving it only on a miss.
+        :param store: SolutionStore to solve from.
+        :param board: Integer of board to solve.
+        :return: Tuple of (key, entry), the entry a list of [buttons, text, size] with text None until rendered.
+        """
+        compiled = store.compiled
+        key = (compiled.rows, compiled.cols, compiled.rule, board)
+
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return key, entry
+
+        self.misses += 1
+        buttons = store.path(board)
+        if buttons is not None:
+            buttons = tuple(buttons)
+
+        entry = [buttons, None, self.entry_size(buttons, None)]
+        self.entries[key] = entry
+        self.bytes += entry[2]
+        self.evict()
+
+        return key, entry
+
+    def solve(self, store, board):
+        """
+        Return the shortest solution of a board, solving only on a miss.
+        :param store: SolutionStore to solve from.
+        :param board: Integer of board to solve.
+        :return: Tuple of buttons, or None for unsolvable boards.
+        """
+        return self.entry(store, board)[1][0]
+
+    def text(self, store, board):
+        """
+        Return the rendered solution of a board, rendering it the first time it is asked for.
+        :param store: SolutionStore to solve from.
+        :param board: Integer of board to solve.
+        :return: Solution text, or a note that the board is unsolvable.
+        """
+        key, entry = self.entry(store, board)
+        buttons, text = entry[0], entry[1]
+        if text is not None:
+            return text
+
+        compiled = store.compiled
+        if buttons is None:
+            text = f'Unsolvable board.\nBoard: {board}'
+        else:
+            text = solution_string(board, buttons, compiled.masks, compiled.rows, compiled.cols)
+
+        # A cache too small for even one entry has already dropped it.
+        if self.entries.get(key) is entry:
+            size = self.entry_size(buttons, text)
+            self.bytes += size - entry[2]
+            entry[1], entry[2] = text, size
+            self.evict()
+
+        return text
+
+    def hit_rate(self):
+        """
+        :return: Fraction of lookups served from the cache.
+        """
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self):
+        """
+        :return: Dictionary of cache counters and current size.
+        """
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hit_rate(),
+            'entries': len(self.entries),
+            'bytes': self.bytes,
+        }
+
+    def clear(self):
+        """
+        Drop every cached solution, keeping the counters.
+        :return:
+        """
+        self.entries.clear()
+        self.bytes = 0
+
+
+shared_cache = SolveCache()
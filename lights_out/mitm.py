@@ -0,0 +1,176 @@
+"""
+Meet-in-the-middle solving for boards too big to tabulate.
+
+The buttons are split into two halves. Every XOR-sum of up to k masks from the first half is precomputed into a
+sorted table holding the fewest presses reaching each sum. A query then walks the subsets of the second half, smallest
+first, and looks up board XOR subset in the table, so a solution is found without ever visiting the 2 ** cells boards.
+Any solution using at most k presses from each half is found, and the one returned has the fewest presses among those.
+With k at least the size of the larger half every press set is covered and the answer is the optimal solution, so a 7x7
+board, split into 24 and 25 buttons, needs k = 25.
+"""
+
+import math
+import random
+import time
+
+import numpy as np
+
+CHUNK = 1 << 20
+
+
+def subset_levels(masks, k):
+    """
+    Yield the XOR-sums of every subset of the masks, one subset size at a time.
+    The levels are views of two buffers used in turn, so a level is overwritten two levels later unless copied.
+    :param masks: Sequence of integer masks.
+    :param k: Largest subset size.
+    :return: Generator of (size, sums, presses) with sums and presses as uint64 arrays, presses as local bit sets.
+    """
+    k = min(k, len(masks))
+    # Reusing the buffers saves faulting in fresh pages for every level, which costs more than computing them.
+    largest = max(math.comb(len(masks), size) for size in range(k + 1))
+    buffers = [(np.zeros(largest, dtype=np.uint64), np.zeros(largest, dtype=np.uint64)) for _ in range(2)]
+
+    sums, presses = buffers[0][0][:1], buffers[0][1][:1]
+    # Number of subsets in the level using only buttons before each button.
+    before = np.ones(len(masks), dtype=np.int64)
+    yield 0, sums, presses
+
+    for size in range(1, k + 1):
+        # Extend each subset only with buttons after its last one, so every subset is built exactly once. Levels are
+        # grouped by last button, so the subsets that a button extends are a prefix of the previous level.
+        starts = np.concatenate(([0], np.cumsum(before)))
+        level_sums, level_presses = (buffer[:starts[-1]] for buffer in buffers[size % 2])
+        for button, mask in enumerate(masks):
+            count = before[button]
+            piece = slice(starts[button], starts[button + 1])
+            np.bitwise_xor(sums[:count], np.uint64(mask), out=level_sums[piece])
+            np.bitwise_or(presses[:count], np.uint64(1 << button), out=level_presses[piece])
+
+        sums, presses, before = level_sums, level_presses, starts[:-1]
+        yield size, sums, presses
+
+
+class MeetInTheMiddle:
+    """
+    Precomputed half table of mask sums for meet-in-the-middle queries.
+    """
+
+    def __init__(self, compiled, k):
+        """
+        Build the table of the first half of the buttons.
+        :param compiled: CompiledRule with two states per light.
+        :param k: Largest number of presses taken from each half.
+        """
+        if compiled.modulus != 2:
+            raise ValueError('Meet-in-the-middle solving needs a rule with two states per light')
+        if compiled.cells > 64:
+            raise ValueError('Meet-in-the-middle tables hold boards of up to 64 cells')
+
+        self.compiled = compiled
+        self.k = k
+        # The right half gets the odd button, exact solving needs k as large as it.
+        self.half = compiled.cells // 2
+        self.left_masks = compiled.masks[:self.half]
+        self.right_masks = compiled.masks[self.half:]
+
+        # Merge one level at a time into the sorted table, so only the table and a single level are held at once.
+        # Levels come smallest first, so a sum already in the table keeps its fewer presses. The table starts out with
+        # the empty press set.
+        self.keys = np.zeros(1, dtype=np.uint64)
+        self.presses = np.zeros(1, dtype=np.uint32)
+        self.weights = np.zeros(1, dtype=np.uint8)
+        for size, sums, presses in subset_levels(self.left_masks, k):
+            sums, first = np.unique(sums, return_index=True)
+            presses = presses[first].astype(np.uint32)
+
+            index = np.searchsorted(self.keys, sums)
+            new = self.keys[np.minimum(index, self.keys.size - 1)] != sums
+            index, sums, presses = index[new], sums[new], presses[new]
+
+            self.keys = np.insert(self.keys, index, sums)
+            self.presses = np.insert(self.presses, index, presses)
+            self.weights = np.insert(self.weights, index, np.uint8(size))
+
+        self.exact = k >= max(len(self.left_masks), len(self.right_masks))
+
+    def nbytes(self):
+        """
+        :return: Memory held by the table in bytes.
+        """
+        return self.keys.nbytes + self.presses.nbytes + self.weights.nbytes
+
+    def solve(self, board):
+        """
+        Find the fewest presses that solve a board, using at most k presses from each half.
+        :param board: Integer board.
+        :return: Integer press set over all buttons, or None if no such solution exists.
+        """
+        board = np.uint64(board)
+        best = None
+        best_weight = None
+
+        for size, sums, presses in subset_levels(self.right_masks, self.k):
+            if best_weight is not None and size >= best_weight:
+                break
+
+            for start in range(0, sums.size, CHUNK):
+                targets = sums[start:start + CHUNK] ^ board
+                index = np.minimum(np.searchsorted(self.keys, targets), self.keys.size - 1)
+                hits = np.flatnonzero(self.keys[index] == targets)
+                if not hits.size:
+                    continue
+
+                weights = self.weights[index[hits]].astype(np.int64) + size
+                pick = int(np.argmin(weights))
+                if best_weight is None or weights[pick] < best_weight:
+                    best_weight = int(weights[pick])
+                    hit = hits[pick]
+                    best = int(self.presses[index[hit]]) | int(presses[start + hit]) << self.half
+
+        return best
+
+
+def benchmark(compiled, ks, queries=20, seed=0):
+    """
+    Report table size, build time and query latency of the meet-in-the-middle engine as k grows.
+    :param compiled: CompiledRule to benchmark.
+    :param ks: Iterable of k values to try.
+    :param queries: Number of random boards to solve for each k.
+    :param seed: Random seed for the boards.
+    :return: List of dictionaries, one per k, with mean and worst query latency.
+    """
+    # Press sets of every size from one button to all of them, so the boards span the whole depth range.
+    rng = random.Random(seed)
+    boards = []
+    for _ in range(queries):
+        board = 0
+        for button in rng.sample(range(compiled.cells), rng.randint(1, compiled.cells)):
+            board ^= compiled.masks[button]
+        boards.append(board)
+
+    results = []
+    for k in ks:
+        start = time.perf_counter()
+        engine = MeetInTheMiddle(compiled, k)
+        build = time.perf_counter() - start
+
+        times = []
+        solved = 0
+        for board in boards:
+            start = time.perf_counter()
+            solved += engine.solve(board) is not None
+            times.append(time.perf_counter() - start)
+
+        results.append({
+            'k': k,
+            'entries': engine.keys.size,
+            'table_mb': engine.nbytes() / (1 << 20),
+            'build_s': build,
+            'exact': engine.exact,
+            'query_ms': sum(times) / len(times) * 1000,
+            'max_query_ms': max(times) * 1000,
+            'solved': solved,
+        })
+
+    return results
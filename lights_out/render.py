@@ -0,0 +1,86 @@
+"""
+Text rendering of boards and buttons.
+"""
+
+
+def row_label(row):
+    """
+    Return the spreadsheet style letter label of a row, A through Z then AA onward.
+    :param row: Zero based row index.
+    :return: Row label.
+    """
+    label = ''
+    row += 1
+    while row:
+        row, remainder = divmod(row - 1, 26)
+        label = chr(ord('A') + remainder) + label
+
+    return label
+
+
+def button_label(button, cols):
+    """
+    Return the grid location of a button, such as C3.
+    :param button: Button index.
+    :param cols: Number of columns on the board.
+    :return: Button label.
+    """
+    return f'{row_label(button // cols)}{button % cols + 1}'
+
+
+def parse_button(label, rows, cols):
+    """
+    Return the button index of a grid location such as C3.
+    :param label: Button label, letters for the row followed by the column number.
+    :param rows: Number of rows on the board.
+    :param cols: Number of columns on the board.
+    :return: Button index.
+    """
+    letters = label.rstrip('0123456789').upper()
+    number = label[len(letters):]
+    if not letters.isalpha() or not letters.isascii() or not number or not 1 <= int(number) <= cols:
+        raise ValueError(f'Invalid button {label!r}')
+
+    row = 0
+    for letter in letters:
+        row = row * 26 + ord(letter) - ord('A') + 1
+    if row > rows:
+        raise ValueError(f'Invalid button {label!r}, the board has rows A to {row_label(rows - 1)}')
+
+    return (row - 1) * cols + int(number) - 1
+
+
+def board_string(board, rows, cols):
+    """
+    Return a string representation of the given board.
+    :param board: Board to represent.
+    :param rows: Number of rows on the board.
+    :param cols: Number of columns on the board.
+    :return: String representation with "X" as light on and "O" as off.
+    """
+    board = int(board)
+
+    lines = []
+    for row in range(rows):
+        lines.append(' '.join('X' if board >> row * cols + col & 1 else 'O' for col in range(cols)))
+
+    return '\n'.join(lines) + '\n\n'
+
+
+def solution_string(board, buttons, masks, rows, cols):
+    """
+    Return the step by step text of a solution, each step followed by the board it leaves.
+    :param board: Integer of the starting board.
+    :param buttons: List of buttons to press, in order.
+    :param masks: Sequence of integer masks, one per button.
+    :param rows: Number of rows on the board.
+    :param cols: Number of columns on the board.
+    :return: Solution text.
+    """
+    parts = ['Starting State\n', board_string(board, rows, cols)]
+    for i, button in enumerate(buttons, start=1):
+        board ^= masks[button]
+        parts.append(f'Step {i}. Button {button_label(button, cols)}\n')
+        parts.append(board_string(board, rows, cols))
+
+    return ''.join(parts)
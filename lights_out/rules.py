@@ -0,0 +1,195 @@
+"""
+Rule variants of Lights Out, compiled once into mask tables.
+
+A Rule only describes the game: which neighbors a press toggles, whether the board wraps around its edges, and how
+many states each light has. compile_rule turns a rule and board size into a CompiledRule holding everything the
+engines need, so table generation, algebraic solving and simulation never branch on the rule while pressing buttons.
+
+Boards with two states per light are plain bit boards, the same integers used everywhere else. Boards with k states
+per light are packed into fixed width digit fields, one field per cell, with a spare guard bit on top of every field so
+a press can be added to every affected cell at once and reduced mod k without touching the other fields.
+"""
+
+from collections import namedtuple
+from functools import lru_cache
+
+NEIGHBORHOODS = {
+    'plus': ((0, 0), (-1, 0), (1, 0), (0, -1), (0, 1)),
+    'moore': ((0, 0), (-1, 0), (1, 0), (0, -1), (0, 1), (-1, -1), (-1, 1), (1, -1), (1, 1)),
+}
+
+Rule = namedtuple('Rule', ['neighborhood', 'wrap', 'modulus'], defaults=['plus', False, 2])
+Rule.__doc__ = """
+Description of a Lights Out variant.
+neighborhood is a key of NEIGHBORHOODS, wrap joins opposite edges of the board and modulus is the number of states
+of each light.
+"""
+
+CLASSIC = Rule()
+TOROIDAL = Rule(wrap=True)
+DIAGONAL = Rule(neighborhood='moore')
+LIGHTS_OUT_2000 = Rule(modulus=3)
+
+RULES = {
+    'classic': CLASSIC,
+    'toroidal': TOROIDAL,
+    'diagonal': DIAGONAL,
+    '2000': LIGHTS_OUT_2000,
+}
+
+
+class CompiledRule:
+    """
+    Mask tables and packed digit layout of a rule on a given board size.
+    """
+
+    def __init__(self, rows, cols, rule):
+        """
+        Build the mask tables.
+        :param rows: Number of rows on the board.
+        :param cols: Number of columns on the board.
+        :param rule: Rule to compile.
+        """
+        if rule.neighborhood not in NEIGHBORHOODS:
+            raise ValueError(f'Unknown neighborhood {rule.neighborhood!r}')
+        if rule.modulus < 2:
+            raise ValueError(f'Modulus must be at least 2, got {rule.modulus}')
+
+        self.rows = rows
+        self.cols = cols
+        self.rule = rule
+        self.cells = rows * cols
+        self.modulus = rule.modulus
+
+        # Cells toggled by each button as a bit board, regardless of modulus.
+        self.masks = tuple(self._cell_mask(i) for i in range(self.cells))
+
+        if self.modulus == 2:
+            self.digit_bits = 1
+            self.patterns = self.masks
+            self.press = self._press_xor
+        else:
+            self.digit_bits = self.modulus.bit_length() + 1
+            self.patterns = tuple(self.spread(mask) for mask in self.masks)
+            self.press = self._press_mod
+
+            low = self.spread((1 << self.cells) - 1)
+            self._guard = low << self.digit_bits - 1
+            self._bias = low * ((1 << self.digit_bits - 1) - self.modulus)
+
+    def _cell_mask(self, button):
+        """
+        Build the bit board of cells toggled by a button.
+        :param button: Index of button pressed.
+        :return: Integer bit board.
+        """
+        row, col = divmod(button, self.cols)
+        mask = 0
+
+        for d_row, d_col in NEIGHBORHOODS[self.rule.neighborhood]:
+            r, c = row + d_row, col + d_col
+            if self.rule.wrap:
+                r %= self.rows
+                c %= self.cols
+            elif not (0 <= r < self.rows and 0 <= c < self.cols):
+                continue
+
+            mask |= 1 << r * self.cols + c
+
+        return mask
+
+    def spread(self, bits):
+        """
+        Place each bit of a bit board at the bottom of its packed digit field.
+        :param bits: Integer bit board.
+        :return: Packed board with a 1 in every set cell.
+        """
+        packed = 0
+        for i in range(self.cells):
+            if bits >> i & 1:
+                packed |= 1 << i * self.digit_bits
+
+        return packed
+
+    def pack(self, digits):
+        """
+        Pack a list of cell values into a board.
+        :param digits: Sequence of light states, one per cell.
+        :return: Packed integer board.
+        """
+        board = 0
+        for i, digit in enumerate(digits):
+            board |= (digit % self.modulus) << i * self.digit_bits
+
+        return board
+
+    def unpack(self, board):
+        """
+        Unpack a board into a list of cell values.
+        :param board: Packed integer board.
+        :return: List of light states, one per cell.
+        """
+        field = (1 << self.digit_bits) - 1
+        return [board >> i * self.digit_bits & field for i in range(self.cells)]
+
+    def _press_xor(self, board, button):
+        """
+        Press a button on a two state board.
+        :param board: Integer bit board.
+        :param button: Index of button pressed.
+        :return: New board.
+        """
+        return board ^ self.masks[button]
+
+    def _press_mod(self, board, button):
+        """
+        Press a button on a packed k state board.
+        :param board: Packed integer board.
+        :param button: Index of button pressed.
+        :return: New board.
+        """
+        board += self.patterns[button]
+        # Guard bits flag every field that reached the modulus, subtract it from exactly those fields.
+        wrapped = (board + self._bias) & self._guard
+        return board - (wrapped >> self.digit_bits - 1) * self.modulus
+
+    def apply(self, board, buttons):
+        """
+        Press a sequence of buttons.
+        :param board: Integer board.
+        :param buttons: Iterable of button indexes.
+        :return: New board.
+        """
+        press = self.press
+        for button in buttons:
+            board = press(board, button)
+
+        return board
+
+    def simulate(self, boards, buttons):
+        """
+        Press the same sequence of buttons on a batch of boards.
+        :param boards: Iterable of integer boards.
+        :param buttons: Sequence of button indexes.
+        :return: List of resulting boards.
+        """
+        if self.modulus == 2:
+            # Presses commute, so the whole sequence collapses to one XOR per board.
+            total = 0
+            for button in buttons:
+                total ^= self.masks[button]
+            return [board ^ total for board in boards]
+
+        return [self.apply(board, buttons) for board in boards]
+
+
+@lru_cache(maxsize=None)
+def compile_rule(rows, cols, rule=CLASSIC):
+    """
+    Compile a rule for a board size, reusing earlier compilations.
+    :param rows: Number of rows on the board.
+    :param cols: Number of columns on the board.
+    :param rule: Rule to compile.
+    :return: CompiledRule.
+    """
+    return CompiledRule(rows, cols, rule)
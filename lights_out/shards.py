@@ -0,0 +1,145 @@
+"""
+Solution tables split into shards that are loaded on demand.
+
+The boards sharing the same high bits form one shard, a contiguous slice of the table saved in its own file. A
+ShardedTable keeps only the shards in use within a memory cap, evicting the least recently used one when a new shard
+is needed, so hosts that can't hold the whole table can still solve from it.
+"""
+
+import json
+import os
+from collections import OrderedDict
+
+from .table import FORMAT_VERSION, SolutionStore
+
+INDEX = 'shards.json'
+DEFAULT_MAX_BYTES = 64 << 20
+
+
+def shard_name(shard):
+    """
+    :param shard: Shard number.
+    :return: File name of the shard.
+    """
+    return f'shard-{shard:05d}.bin'
+
+
+def write_shards(table, directory, shard_bits=6):
+    """
+    Split a table into 2 ** shard_bits shards keyed by the high bits of the board.
+    :param table: SolutionTable to split.
+    :param directory: Directory to write the shards to. Created if missing.
+    :param shard_bits: Number of high board bits that pick the shard.
+    :return:
+    """
+    compiled = table.compiled
+    if not 0 <= shard_bits <= compiled.cells:
+        raise ValueError(f'shard_bits must be between 0 and {compiled.cells}, got {shard_bits}')
+
+    os.makedirs(directory, exist_ok=True)
+    shard_size = 1 << compiled.cells - shard_bits
+
+    for shard in range(1 << shard_bits):
+        start = shard * shard_size
+        with open(os.path.join(directory, shard_name(shard)), 'wb') as file:
+            file.write(table.buttons[start:start + shard_size])
+            file.write(table.depths[start:start + shard_size])
+
+    with open(os.path.join(directory, INDEX), 'w') as file:
+        json.dump({'version': FORMAT_VERSION, 'rows': compiled.rows, 'cols': compiled.cols,
+                   'rule': list(compiled.rule), 'shard_bits': shard_bits}, file)
+
+
+class ShardedTable(SolutionStore):
+    """
+    Solution table whose shards are read from disk on demand and held in a bounded LRU cache.
+    """
+
+    def __init__(self, directory, compiled, max_bytes=DEFAULT_MAX_BYTES):
+        """
+        :param directory: Directory written by write_shards.
+        :param compiled: CompiledRule the table was generated for.
+        :param max_bytes: Memory cap on the loaded shards. At least one shard is always kept.
+        """
+        super().__init__(compiled)
+
+        with open(os.path.join(directory, INDEX)) as file:
+            index = json.load(file)
+        if index['version'] != FORMAT_VERSION or (index['rows'], index['cols']) != (compiled.rows, compiled.cols):
+            raise ValueError(f'{directory} does not hold version {FORMAT_VERSION} shards for this board')
+        if index.get('rule') != list(compiled.rule):
+            raise ValueError(f'{directory} holds shards for rule {index.get("rule")}, not {list(compiled.rule)}')
+
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.low_bits = compiled.cells - index['shard_bits']
+        self.low_mask = (1 << self.low_bits) - 1
+        self.shard_size = 1 << self.low_bits
+
+        self.loaded = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def shard_of(self, board):
+        """
+        :param board: Integer board.
+        :return: Number of the shard holding the board.
+        """
+        return board >> self.low_bits
+
+    def load_shard(self, shard):
+        """
+        Return a shard, reading it from disk and evicting old shards if it isn't loaded.
+        :param shard: Shard number.
+        :return: Bytes of the shard, buttons followed by depths.
+        """
+        data = self.loaded.get(shard)
+        if data is not None:
+            self.hits += 1
+            self.loaded.move_to_end(shard)
+            return data
+
+        self.misses += 1
+        with open(os.path.join(self.directory, shard_name(shard)), 'rb') as file:
+            data = file.read()
+
+        while self.loaded and (len(self.loaded) + 1) * len(data) > self.max_bytes:
+            self.loaded.popitem(last=False)
+            self.evictions += 1
+
+        self.loaded[shard] = data
+        return data
+
+    def lookup(self, board):
+        data = self.load_shard(board >> self.low_bits)
+        offset = board & self.low_mask
+        return data[offset], data[self.shard_size + offset]
+
+    def prefetch(self, boards):
+        """
+        Order a batch of boards so boards in the same shard are solved back to back.
+        :param boards: Iterable of integer boards.
+        :return: List of the boards grouped by shard.
+        """
+        return sorted(boards, key=self.shard_of)
+
+    def solve_many(self, boards):
+        """
+        Solve a batch of boards, visiting them shard by shard.
+        :param boards: Iterable of integer boards.
+        :return: Dictionary of board to list of buttons, or None for unsolvable boards.
+        """
+        return {board: self.path(board) for board in self.prefetch(boards)}
+
+    def stats(self):
+        """
+        :return: Dictionary of cache counters and current memory use.
+        """
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'loaded_shards': len(self.loaded),
+            'loaded_bytes': sum(len(data) for data in self.loaded.values()),
+        }
@@ -0,0 +1,184 @@
+"""
+SQLite storage of a solution table, for querying it as well as solving from it.
+
+Each solvable board is one row holding its depth, the first button of its shortest solution and the number of lights
+on. Covering indexes on (depth, button) and (lights, depth) answer the common analyst queries from the index alone.
+"""
+
+import sqlite3
+
+from .table import FORMAT_VERSION, NO_BUTTON, UNREACHABLE, SolutionStore, light_counts
+
+SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE solutions (
+    board INTEGER PRIMARY KEY,
+    depth INTEGER NOT NULL,
+    button INTEGER,
+    lights INTEGER NOT NULL
+);
+"""
+
+INDEXES = """
+CREATE INDEX solutions_by_depth ON solutions (depth, button, board);
+CREATE INDEX solutions_by_lights ON solutions (lights, depth, board);
+"""
+
+
+def execute_script(connection, script):
+    """
+    Run each statement of a script inside the current transaction, which executescript would commit.
+    :param connection: sqlite3 connection.
+    :param script: Semicolon separated SQL statements.
+    :return:
+    """
+    for statement in script.split(';'):
+        if statement.strip():
+            connection.execute(statement)
+
+
+def write_sqlite(table, path, chunk=1 << 18):
+    """
+    Write a solution table to a new SQLite database in a single transaction.
+    :param table: SolutionTable to write.
+    :param path: Path of the database file. Must not already hold a solutions table.
+    :param chunk: Number of rows built in memory per executemany call.
+    :return:
+    """
+    compiled = table.compiled
+    buttons, depths = table.arrays()
+    boards = table.reachable()
+
+    connection = sqlite3.connect(path, isolation_level=None)
+    try:
+        connection.execute('PRAGMA journal_mode = OFF')
+        connection.execute('PRAGMA synchronous = OFF')
+        connection.execute('BEGIN')
+        execute_script(connection, SCHEMA)
+
+        connection.executemany('INSERT INTO meta VALUES (?, ?)', [
+            ('version', FORMAT_VERSION), ('rows', compiled.rows), ('cols', compiled.cols),
+            ('rule', repr(tuple(compiled.rule))),
+        ])
+
+        for start in range(0, boards.size, chunk):
+            block = boards[start:start + chunk]
+            rows = zip(
+                block.tolist(),
+                depths[block].tolist(),
+                [None if b == NO_BUTTON else b for b in buttons[block].tolist()],
+                light_counts(block, compiled.cells).tolist(),
+            )
+            connection.executemany('INSERT INTO solutions VALUES (?, ?, ?, ?)', rows)
+
+        # Building the indexes once after loading is much faster than maintaining them on every insert.
+        execute_script(connection, INDEXES)
+        connection.execute('COMMIT')
+    finally:
+        connection.close()
+
+
+class SQLiteStore(SolutionStore):
+    """
+    Solution storage backed by a database written by write_sqlite.
+    """
+
+    def __init__(self, path, compiled):
+        """
+        :param path: Path of the database file.
+        :param compiled: CompiledRule the table was generated for.
+        """
+        super().__init__(compiled)
+        self.connection = sqlite3.connect(f'file:{path}?mode=ro', uri=True, check_same_thread=False)
+
+        meta = dict(self.connection.execute('SELECT key, value FROM meta'))
+        if (int(meta['version']), int(meta['rows']), int(meta['cols'])) != (
+                FORMAT_VERSION, compiled.rows, compiled.cols):
+            raise ValueError(f'{path} does not hold a version {FORMAT_VERSION} table for this board')
+        if meta['rule'] != repr(tuple(compiled.rule)):
+            raise ValueError(f'{path} holds a table for rule {meta["rule"]}, not {tuple(compiled.rule)!r}')
+
+    def lookup(self, board):
+        row = self.connection.execute('SELECT button, depth FROM solutions WHERE board = ?', (board,)).fetchone()
+        if row is None:
+            return NO_BUTTON, UNREACHABLE
+
+        button, depth = row
+        return NO_BUTTON if button is None else button, depth
+
+    def boards_at_depth(self, depth, button=None):
+        """
+        Return every board whose shortest solution takes the given number of presses.
+        :param depth: Number of presses.
+        :param button: Optional button the solution must start with.
+        :return: List of integer boards, in index order.
+        """
+        if button is None:
+            query = self.connection.execute('SELECT board FROM solutions WHERE depth = ?', (depth,))
+        else:
+            query = self.connection.execute(
+                'SELECT board FROM solutions WHERE depth = ? AND button = ?', (depth, button)
+            )
+
+        return [board for board, in query]
+
+    def boards_with_lights(self, lights, depth=None):
+        """
+        Return every solvable board with the given number of lights on.
+        :param lights: Number of lights on.
+        :param depth: Optional number of presses the shortest solution must take.
+        :return: List of integer boards, in index order.
+        """
+        if depth is None:
+            query = self.connection.execute('SELECT board FROM solutions WHERE lights = ?', (lights,))
+        else:
+            query = self.connection.execute(
+                'SELECT board FROM solutions WHERE lights = ? AND depth = ?', (lights, depth)
+            )
+
+        return [board for board, in query]
+
+    def count_at_depth(self, depth, button=None):
+        """
+        Count the boards boards_at_depth would return, from the depth index alone.
+        :param depth: Number of presses.
+        :param button: Optional button the solution must start with.
+        :return: Number of boards.
+        """
+        if button is None:
+            query = self.connection.execute('SELECT COUNT(*) FROM solutions WHERE depth = ?', (depth,))
+        else:
+            query = self.connection.execute(
+                'SELECT COUNT(*) FROM solutions WHERE depth = ? AND button = ?', (depth, button)
+            )
+
+        return query.fetchone()[0]
+
+    def count_with_lights(self, lights, depth=None):
+        """
+        Count the boards boards_with_lights would return, from the lights index alone.
+        :param lights: Number of lights on.
+        :param depth: Optional number of presses the shortest solution must take.
+        :return: Number of boards.
+        """
+        if depth is None:
+            query = self.connection.execute('SELECT COUNT(*) FROM solutions WHERE lights = ?', (lights,))
+        else:
+            query = self.connection.execute(
+                'SELECT COUNT(*) FROM solutions WHERE lights = ? AND depth = ?', (lights, depth)
+            )
+
+        return query.fetchone()[0]
+
+    def depth_counts(self):
+        """
+        :return: Dictionary of depth to number of boards at that depth.
+        """
+        return dict(self.connection.execute('SELECT depth, COUNT(*) FROM solutions GROUP BY depth'))
+
+    def close(self):
+        """
+        Close the database connection.
+        :return:
+        """
+        self.connection.close()
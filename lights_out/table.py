@@ -0,0 +1,238 @@
+"""
+Compact solution tables.
+
+A table holds two bytes for every possible board: the button that starts the shortest path from that board to the
+solved board, and the number of presses that path takes. Boards are the table indexes, so a lookup is a single array
+access, and the next board on the path is just the board XOR the mask of the button.
+
+On disk a table is a small header, holding a CRC32 checksum of the data, followed by the raw button and depth
+arrays, which are memory mapped on load.
+"""
+
+import mmap
+import struct
+import zlib
+
+import numpy as np
+
+FORMAT_VERSION = 2
+MAGIC = b'LOTB'
+HEADER = struct.Struct('<4sHHHI')
+
+NO_BUTTON = 255
+UNREACHABLE = 255
+# Two bytes per board make a 30 cell table 2 GiB, larger boards are solved algebraically instead.
+MAX_TABLE_CELLS = 30
+
+POPCOUNT8 = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+def light_counts(boards, cells):
+    """
+    Count the lights on in each of an array of boards.
+    :param boards: NumPy integer array of boards.
+    :param cells: Number of cells on the board.
+    :return: NumPy uint8 array of light counts.
+    """
+    boards = boards.astype(np.uint64, copy=False)
+    counts = np.zeros(boards.shape, dtype=np.uint8)
+    for shift in range(0, cells, 8):
+        counts += POPCOUNT8[(boards >> np.uint64(shift)) & np.uint64(255)]
+
+    return counts
+
+
+class SolutionStore:
+    """
+    Interface shared by every way of storing solutions. Subclasses only need to implement lookup.
+    """
+
+    def __init__(self, compiled):
+        """
+        :param compiled: CompiledRule the solutions were generated for.
+        """
+        self.compiled = compiled
+        self.masks = compiled.masks
+
+    def lookup(self, board):
+        """
+        Return the first button and number of presses for a board.
+        :param board: Integer board.
+        :return: Tuple of (button, depth). Depth is UNREACHABLE for unsolvable boards.
+        """
+        raise NotImplementedError
+
+    def solvable(self, board):
+        """
+        :param board: Integer board.
+        :return: True if the board can be solved.
+        """
+        return self.lookup(board)[1] != UNREACHABLE
+
+    def depth(self, board):
+        """
+        :param board: Integer board.
+        :return: Number of presses in the shortest solution, or UNREACHABLE.
+        """
+        return self.lookup(board)[1]
+
+    def path(self, board):
+        """
+        Return the buttons of the shortest solution, in press order.
+        :param board: Integer board.
+        :return: List of button indexes, or None if the board is unsolvable.
+        """
+        button, depth = self.lookup(board)
+        if depth == UNREACHABLE:
+            return None
+
+        buttons = []
+        while depth:
+            buttons.append(button)
+            board ^= self.masks[button]
+            button, depth = self.lookup(board)
+
+        return buttons
+
+    def steps(self, board):
+        """
+        Return each board along the shortest solution, paired with the button pressed to reach it.
+        :param board: Integer board.
+        :return: List of (board, button) tuples starting with (board, None), or None if the board is unsolvable.
+        """
+        buttons = self.path(board)
+        if buttons is None:
+            return None
+
+        steps = [(board, None)]
+        for button in buttons:
+            board ^= self.masks[button]
+            steps.append((board, button))
+
+        return steps
+
+
+class SolutionTable(SolutionStore):
+    """
+    Solutions held as two flat byte arrays indexed by board.
+    """
+
+    def __init__(self, compiled, buttons, depths, checksum=None):
+        """
+        :param compiled: CompiledRule the solutions were generated for.
+        :param buttons: Buffer of first buttons, one byte per board.
+        :param depths: Buffer of depths, one byte per board.
+        :param checksum: CRC32 stored with the table, if it was loaded from disk.
+        """
+        super().__init__(compiled)
+        self.buttons = memoryview(buttons).cast('B')
+        self.depths = memoryview(depths).cast('B')
+        self.checksum = checksum
+
+    def lookup(self, board):
+        return self.buttons[board], self.depths[board]
+
+    def arrays(self):
+        """
+        Return NumPy views of the table without copying it.
+        :return: Tuple of (buttons, depths) uint8 arrays.
+        """
+        return np.frombuffer(self.buttons, dtype=np.uint8), np.frombuffer(self.depths, dtype=np.uint8)
+
+    def reachable(self):
+        """
+        :return: NumPy array of every solvable board, in increasing order.
+        """
+        return np.flatnonzero(self.arrays()[1] != UNREACHABLE)
+
+    def compute_checksum(self):
+        """
+        :return: CRC32 of the button and depth arrays.
+        """
+        return zlib.crc32(self.depths, zlib.crc32(self.buttons))
+
+    def save(self, path):
+        """
+        Write the table to disk.
+        :param path: File path to write.
+        :return:
+        """
+        with open(path, 'wb') as file:
+            file.write(HEADER.pack(
+                MAGIC, FORMAT_VERSION, self.compiled.rows, self.compiled.cols, self.compute_checksum()
+            ))
+            file.write(self.buttons)
+            file.write(self.depths)
+
+
+def check_tabulable(compiled):
+    """
+    Raise ValueError unless a solution table can be generated for a compiled rule.
+    :param compiled: CompiledRule to check.
+    :return:
+    """
+    if compiled.modulus != 2:
+        raise ValueError('Solution tables are indexed by bit board and need a rule with two states per light')
+    if compiled.cells > MAX_TABLE_CELLS:
+        raise ValueError(f'A {compiled.rows}x{compiled.cols} board has {compiled.cells} cells, solution tables hold '
+                         f'at most {MAX_TABLE_CELLS}; solve it algebraically instead')
+
+
+def generate_table(compiled, progress=None):
+    """
+    Breadth first search out from the solved board, recording the first button and depth of every reachable board.
+    :param compiled: CompiledRule with two states per light.
+    :param progress: Optional callable given (depth, boards found) after each layer.
+    :return: SolutionTable.
+    """
+    check_tabulable(compiled)
+
+    size = 1 << compiled.cells
+    buttons = np.full(size, NO_BUTTON, dtype=np.uint8)
+    depths = np.full(size, UNREACHABLE, dtype=np.uint8)
+    depths[0] = 0
+
+    frontier = np.zeros(1, dtype=np.uint64)
+    found = 1
+    depth = 0
+    while frontier.size:
+        depth += 1
+        layer = []
+        # Presses commute, so the button reaching a new board from the layer before also starts its solution.
+        for button, mask in enumerate(compiled.masks):
+            candidates = frontier ^ np.uint64(mask)
+            candidates = candidates[depths[candidates] == UNREACHABLE]
+            buttons[candidates] = button
+            depths[candidates] = depth
+            layer.append(candidates)
+
+        frontier = np.concatenate(layer)
+        found += frontier.size
+        if progress is not None:
+            progress(depth, found)
+
+    return SolutionTable(compiled, buttons, depths)
+
+
+def load_table(path, compiled):
+    """
+    Memory map a table written by SolutionTable.save.
+    :param path: File path to read.
+    :param compiled: CompiledRule the table was generated for.
+    :return: SolutionTable.
+    """
+    with open(path, 'rb') as file:
+        mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    magic, version, rows, cols, checksum = HEADER.unpack_from(mapped)
+    if magic != MAGIC or version != FORMAT_VERSION:
+        raise ValueError(f'{path} is not a version {FORMAT_VERSION} solution table')
+    if (rows, cols) != (compiled.rows, compiled.cols):
+        raise ValueError(f'{path} holds a {rows}x{cols} table, expected {compiled.rows}x{compiled.cols}')
+
+    size = 1 << compiled.cells
+    if len(mapped) != HEADER.size + 2 * size:
+        raise ValueError(f'{path} is truncated')
+
+    view = memoryview(mapped)
+    return SolutionTable(compiled, view[HEADER.size:HEADER.size + size], view[HEADER.size + size:], checksum)
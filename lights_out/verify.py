@@ -0,0 +1,74 @@
+"""
+Whole table integrity checks.
+
+A table is only trusted if every solvable board points at a parent one mask away and one press closer to solved, the
+number of solvable boards matches the GF(2) rank of the masks, and the data matches the checksum stored with it. All
+checks run as vectorized NumPy passes over the table, in chunks to bound memory.
+"""
+
+import numpy as np
+
+from .algebra import eliminate
+from .table import NO_BUTTON, UNREACHABLE
+
+CHUNK = 1 << 22
+
+
+def verify_table(table, thorough=False):
+    """
+    Check a solution table for corruption or staleness.
+    :param table: SolutionTable to check.
+    :param thorough: Also check that no neighbor of a board is more than one press closer to solved, which proves
+        every depth is a shortest path, at the cost of one pass per button.
+    :return: List of problems found. Empty if the table is sound.
+    """
+    compiled = table.compiled
+    buttons, depths = table.arrays()
+    masks = np.array(compiled.masks, dtype=np.int64)
+    problems = []
+
+    if table.checksum is not None and table.checksum != table.compute_checksum():
+        problems.append('checksum does not match the stored checksum')
+
+    if depths[0] != 0 or buttons[0] != NO_BUTTON:
+        problems.append('solved board is not at depth 0')
+
+    rank = compiled.cells - len(eliminate(compiled.masks).null_basis)
+    reachable = 0
+    for start in range(0, depths.size, CHUNK):
+        chunk_depths = depths[start:start + CHUNK]
+        chunk_buttons = buttons[start:start + CHUNK]
+
+        solvable = chunk_depths != UNREACHABLE
+        reachable += int(np.count_nonzero(solvable))
+
+        if np.any(chunk_buttons[~solvable] != NO_BUTTON):
+            problems.append(f'unsolvable board with a button in the chunk starting at board {start}')
+
+        boards = np.flatnonzero(solvable) + start
+        boards = boards[boards != 0]
+        board_buttons = buttons[boards]
+        # Signed so that a stray depth 0 does not wrap round to UNREACHABLE.
+        board_depths = depths[boards].astype(np.int16)
+
+        if np.any(board_depths == 0):
+            problems.append(f'unsolved board at depth 0 in the chunk starting at board {start}')
+
+        if np.any(board_buttons >= compiled.cells):
+            problems.append(f'button out of range in the chunk starting at board {start}')
+            continue
+
+        parents = boards ^ masks[board_buttons]
+        if np.any(depths[parents] != board_depths - 1):
+            problems.append(f'parent not one press closer in the chunk starting at board {start}')
+
+        if thorough:
+            for mask in masks:
+                if np.any(depths[boards ^ mask] < board_depths - 1):
+                    problems.append(f'depth is not a shortest path in the chunk starting at board {start}')
+                    break
+
+    if reachable != 1 << rank:
+        problems.append(f'{reachable:,} solvable boards, masks of rank {rank} reach {1 << rank:,}')
+
+    return problems